@@ -1,21 +1,30 @@
 """
 主Agent执行多智能体推理循环
 """
-import os
-import sys
-from typing import Dict, Any, List, Optional
-
-# 添加项目根目录到路径
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import hashlib
+import importlib
+import inspect
+import threading
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Set
 
 from config import Config
 from planner.planner import DeepSeekPlanner
-from tools.search_tool import KnowledgeBaseSearchTool
-from tools.web_search_tool import WebSearchTool
-from tools.summarizer_tool import SummarizerTool
+from planner.planner_cache import PlannerCache
 from memory.memory_manager import MemoryManager
 
 
+# 子查询是否为链接：仅做前缀判断，无需完整解析URL
+_URL_PREFIXES = ('http://', 'https://')
+
+
+@lru_cache(maxsize=4096)
+def _canonical_url(url: str) -> str:
+    """规范化URL（去除空白、片段和末尾斜杠），作为网页内容缓存的键"""
+    return url.strip().split('#', 1)[0].rstrip('/')
+
+
 class MainAgent:
     """主智能体，控制整个多智能体推理流程"""
     
@@ -23,21 +32,31 @@ class MainAgent:
         """初始化主智能体"""
         self.config = Config()
         self.planner = DeepSeekPlanner()
+        if Config.ENABLE_PLANNER_CACHE:
+            self.planner = PlannerCache(self.planner)
         self.memory_manager = MemoryManager()
         
-        # 初始化工具
-        self.tools = {
-            'search_knowledge_base': KnowledgeBaseSearchTool(),
-            'web_search': WebSearchTool(),
-            'summarize_text': SummarizerTool()
+        # 工具按需加载：首次使用时才导入模块并实例化
+        self._tool_factories = {
+            'search_knowledge_base': ('tools.search_tool', 'KnowledgeBaseSearchTool'),
+            'web_search': ('tools.web_search_tool', 'WebSearchTool'),
+            'summarize_text': ('tools.summarizer_tool', 'SummarizerTool')
         }
+        self.tools = {}
+        # 并发子查询可能同时在不同线程中首次加载同一工具，加锁避免重复创建
+        self._tool_lock = threading.Lock()
         
         # 推理状态
         self.current_iteration = 0
         self.max_iterations = Config.MAX_ITERATIONS
         self.recent_context_num =Config.RECENT_CONTEXT
+        
+        # 会话级缓存：子查询总结结果 与 网页内容
+        # 按插入顺序限定容量，超出时淘汰最早的条目，避免长会话内存无限增长
+        self._subquery_cache: Dict[bytes, Dict[str, Any]] = {}
+        self._content_cache: Dict[str, str] = {}
     
-    def execute_reasoning(self, query: str, context: Optional[str] = None) -> Dict[str, Any]:
+    async def execute_reasoning(self, query: str, context: Optional[str] = None) -> Dict[str, Any]:
         """
         执行推理循环流程
         
@@ -59,10 +78,11 @@ class MainAgent:
             context = ""
 
             # 主推理循环
-            final_result = self._reasoning_loop(query, context)
+            final_result = await self._reasoning_loop(query, context)
             
-            # 保存到内存
-            self.memory_manager.add_memory_entry(
+            # 保存到内存（定期落盘会序列化全部条目，在线程中执行以免阻塞事件循环）
+            await self._call_tool(
+                self.memory_manager.add_memory_entry,
                 query=query,
                 context=final_result.get('reasoning_trace', ''),
                 final_answer=final_result.get('answer', ''),
@@ -77,7 +97,7 @@ class MainAgent:
             }
             return error_result
     
-    def _reasoning_loop(self, query: str, context: str) -> Dict[str, Any]:
+    async def _reasoning_loop(self, query: str, context: str) -> Dict[str, Any]:
         """
         新的推理循环流程
         
@@ -88,90 +108,171 @@ class MainAgent:
         Returns:
             推理结果
         """
-        links = []
-        # 步骤1: 使用planner分解查询或提取链接
-        sub_queries = self.planner.decompose_query(query)
+        # 已使用的链接，用集合保证O(1)去重
+        links = set()
+        links_lock = asyncio.Lock()
+        speculative_final = None
+        # 上下文以片段列表累积，每轮只拼接一次，避免逐条字符串拼接的重复拷贝
+        context_parts = [context] if context else []
+        # 已成功总结的子查询，避免在不断增长的上下文中做子串查找
+        processed = set()
+        # 循环内不变的量提前取出
+        planner = self.planner
+        max_iterations = self.max_iterations
+        speculate = Config.ENABLE_SPECULATIVE_FINAL_ANSWER
+        # 连续失败计数，用于指数退避和熔断
+        consecutive_failures = 0
+        # 步骤1: 使用planner分解查询或提取链接，
+        # 开启预加载时，等待planner响应的同时在线程中加载知识库检索工具（加载索引较慢）
+        decompose_task = asyncio.create_task(self._call_tool(planner.decompose_query, query))
+        if Config.PRELOAD_KNOWLEDGE_BASE and 'search_knowledge_base' not in self.tools:
+            try:
+                await self._load_tool('search_knowledge_base')
+            except Exception as e:
+                print(f"⚠️ 预加载知识库检索工具失败: {str(e)}")
+        sub_queries = await decompose_task
         
-        while self.current_iteration < self.max_iterations:
+        while self.current_iteration < max_iterations:
             self.current_iteration += 1
-            print(f"\n🔄 推理迭代 {self.current_iteration}/{self.max_iterations}")
+            print(f"\n🔄 推理迭代 {self.current_iteration}/{max_iterations}")
             
-            # 步骤2: 对每个子查询进行搜索和总结
-            for sub_query in sub_queries:
-                if sub_query and f"关于'{sub_query}'的总结" not in context:
-                    result = self._process_sub_query(query, sub_query, links)
-                    if result:
-                        context += f"\n\n关于'{sub_query}'的总结：{result['summary']}\n参考链接：{result['url']}"
+            # 步骤2: 并发处理所有子查询的搜索和总结
+            pending = [
+                sub_query for sub_query in sub_queries
+                if sub_query and sub_query not in processed
+            ]
+            results = await asyncio.gather(
+                *[self._process_sub_query(query, sub_query, links, links_lock) for sub_query in pending],
+                return_exceptions=True
+            )
+            for sub_query, result in zip(pending, results):
+                if isinstance(result, Exception):
+                    print(f"❌ 处理子查询出错: {str(result)}")
+                    continue
+                if result:
+                    processed.add(sub_query)
+                    context_parts.append(f"\n\n关于'{sub_query}'的总结：{result['summary']}\n参考链接：{result['url']}")
+            context = "".join(context_parts)
+
+            # 最后一轮时推测性地并行生成强制答案，使其与反思调用重叠
+            speculative_final = None
+            if speculate and self.current_iteration >= max_iterations:
+                speculative_final = asyncio.create_task(
+                    self._call_tool(planner.generate_final_answer, query, context)
+                )
 
             # 步骤3: 使用planner判断是否能得出答案
-            reflection = self.planner.reflect_on_progress(query, context)
+            try:
+                reflection = await self._call_tool(planner.reflect_on_progress, query, context)
+                consecutive_failures = 0
+            except Exception as e:
+                consecutive_failures += 1
+                print(f"❌ 反思进展出错 (连续 {consecutive_failures} 次): {str(e)}")
+                if consecutive_failures >= Config.MAX_CONSECUTIVE_FAILURES:
+                    print("⚠️ planner连续失败，停止迭代")
+                    break
+                # 指数退避，避免在依赖服务故障时空耗迭代；已是最后一轮时直接退出，无需等待
+                if self.current_iteration < max_iterations:
+                    await asyncio.sleep(min(2 ** consecutive_failures, 30))
+                continue
 
             if reflection['can_answer']:
                 print("✅ 已收集足够信息，生成最终答案")
-                return self._generate_final_answer(query, context, reflection['answer'], reflection['reasoning_trace'], reflection['citations'])
+                if speculative_final and reflection['answer']:
+                    # 只能丢弃结果：已在线程中执行的planner调用不会因cancel而停止
+                    speculative_final.cancel()
+                    speculative_final = None
+                return await self._generate_final_answer(query, context, reflection['answer'], reflection['reasoning_trace'], reflection['citations'], speculative=speculative_final)
             else:
                 print("📝 信息不足，需要继续搜索")
                 # 如果planner建议了新的查询方向，更新query用于下次迭代
                 if reflection['suggested_queries'] != []:
                     sub_queries = reflection['suggested_queries']
                 else:
-                    return self._generate_final_answer(query, context, forced=True)
+                    return await self._generate_final_answer(query, context, forced=True, speculative=speculative_final)
 
-        # 达到最大迭代次数，强制生成答案
+        # 达到最大迭代次数或planner连续失败，强制生成答案
         print("⚠️ 达到最大迭代次数，强制生成答案")
-        return self._generate_final_answer(query, context, forced=True)
+        return await self._generate_final_answer(query, context, forced=True, speculative=speculative_final)
 
-    def _process_sub_query(self, query: str, sub_query: str, links: List[str]) -> Optional[str]:
+    async def _process_sub_query(self, query: str, sub_query: str, links: Set[str],
+                                 links_lock: asyncio.Lock) -> Optional[Dict[str, Any]]:
         """
-        处理单个子查询
+        处理单个子查询（工具调用经由_call_tool执行，避免阻塞事件循环）
         
         Args:
+            query: 原始查询
             sub_query: 子查询或链接
+            links: 已访问链接集合（多个子查询共享）
+            links_lock: 保护links的锁
             
         Returns:
-            总结后的内容
+            包含总结和链接的字典
         """
         try:
             print(f"\n🔍 处理子查询: {sub_query}")
             url = None
             
+            # 总结结果与原始查询相关，因此缓存键同时包含原始查询和子查询
+            cache_key = hashlib.blake2b(f"{query}\x1f{sub_query}".encode('utf-8'), digest_size=16).digest()
+            cached = self._subquery_cache.get(cache_key)
+            if cached:
+                print(f"⚡ 命中子查询缓存: {sub_query}")
+                if cached['url']:
+                    async with links_lock:
+                        links.add(cached['url'])
+                return cached
+            
             # 检查是否是链接
-            if sub_query.startswith('https://'):
+            if sub_query.startswith(_URL_PREFIXES):
                 # 直接从链接获取内容
-                document = self.tools['web_search']._get_content_via_jina(sub_query)
                 url = sub_query
-                links.append(url)
+                async with links_lock:
+                    links.add(url)
+                document = await self._fetch_content(url)
             else:
                 # 先搜索知识库
-                kb_result = self.tools['search_knowledge_base'].search(sub_query)
+                kb_tool = await self._load_tool('search_knowledge_base')
+                kb_result = await self._call_tool(kb_tool.search, sub_query)
                 
                 if kb_result['use_knowledge_base']:
                     print("✅ 使用知识库结果")
                     document = kb_result['results'][0] if kb_result['results'] else None
                 else:
                     print("🌐 知识库相关性不足，使用Web搜索")
-                    # 使用web搜索
-                    web_results = self.tools['web_search']._search_via_jina(sub_query, links, count=1)
-                    document = self.tools['web_search']._get_content_via_jina(web_results[0]) if web_results else None
-                    url = web_results[0] if web_results else None
-                    links.append(url) if url else None
+                    # 使用web搜索；并发的子查询可能搜到同一页面，多取一个候选，
+                    # 在锁内领取第一个尚未被其他子查询使用的链接
+                    web_search = await self._load_tool('web_search')
+                    web_results = await self._call_tool(
+                        web_search._search_via_jina, sub_query, links, count=2
+                    )
+                    async with links_lock:
+                        for candidate in web_results:
+                            if candidate not in links:
+                                url = candidate
+                                links.add(url)
+                                break
+                    document = await self._fetch_content(url) if url else None
             
             if not document:
                 print(f"❌ 无法获取文档: {sub_query}")
                 return None
             
             # 使用summarizer总结文档内容
+            summarizer = await self._load_tool('summarize_text')
             if len(document) > 50000:  # 对长文档使用分批总结
-                summary = self.tools['summarize_text'].batch_summarize(
+                summary = await summarizer.parallel_batch_summarize(
                     query=query, 
                     text=document, 
                     chunk_size=50000,
+                    chunk_overlap=500,
                     chunk_summary_length=500,
                     final_summary_length=500,
                     style='general'
                 )
             elif len(document) > 500:  # 中等长度文档使用常规总结
-                summary = self.tools['summarize_text']._llm_summarize(
+                summary = await self._call_tool(
+                    summarizer._llm_summarize,
                     query, document, max_length=500, style='general'
                 )
             else:
@@ -179,17 +280,104 @@ class MainAgent:
             
             
             print(f"📝 完成子查询处理，总结长度: {len(summary)}\n摘要内容: {summary[:100]}...")
-            return {
+            result = {
                 'summary': summary,
                 'url': url
             }
+            self._cache_put(self._subquery_cache, cache_key, result, Config.SUBQUERY_CACHE_SIZE)
+            return result
 
         except Exception as e:
             print(f"❌ 处理子查询出错: {str(e)}")
             return None
 
 
-    def _generate_final_answer(self, query: str, context: str, answer: str = "", reasoning_trace: str = "", citations: List[str] = [], forced: bool = False) -> Dict[str, Any]:
+    def _get_tool(self, name: str) -> Any:
+        """
+        获取工具实例，首次使用时导入并创建
+        
+        Args:
+            name: 工具名
+            
+        Returns:
+            工具实例
+        """
+        tool = self.tools.get(name)
+        if tool is None:
+            with self._tool_lock:
+                tool = self.tools.get(name)
+                if tool is None:
+                    module_name, class_name = self._tool_factories[name]
+                    tool = getattr(importlib.import_module(module_name), class_name)()
+                    self.tools[name] = tool
+        return tool
+
+    async def _load_tool(self, name: str) -> Any:
+        """
+        获取工具实例，未加载时在线程中创建（加载索引和嵌入模型较慢，不能阻塞事件循环）
+        
+        Args:
+            name: 工具名
+            
+        Returns:
+            工具实例
+        """
+        tool = self.tools.get(name)
+        if tool is None:
+            tool = await self._call_tool(self._get_tool, name)
+        return tool
+
+    async def _call_tool(self, fn, *args, **kwargs) -> Any:
+        """
+        调用工具或planner方法：协程函数直接await，同步函数卸载到线程池执行
+        
+        Args:
+            fn: 待调用的函数
+            
+        Returns:
+            函数返回值
+        """
+        if inspect.iscoroutinefunction(fn):
+            return await fn(*args, **kwargs)
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    async def _fetch_content(self, url: str) -> str:
+        """
+        获取网页内容，同一会话内相同页面只请求一次
+        
+        Args:
+            url: 网页URL
+            
+        Returns:
+            网页内容
+        """
+        canonical_url = _canonical_url(url)
+        content = self._content_cache.get(canonical_url)
+        if content is None:
+            web_search = await self._load_tool('web_search')
+            content = await self._call_tool(web_search._get_content_via_jina, url)
+            # 请求失败时返回的是错误说明，不缓存
+            if not content.startswith(("无法通过Jina API获取内容", "Jina API调用失败")):
+                self._cache_put(self._content_cache, canonical_url, content, Config.CONTENT_CACHE_SIZE)
+        return content
+
+    def _cache_put(self, cache: Dict[Any, Any], key: Any, value: Any, max_size: int):
+        """
+        写入容量受限的会话缓存，超出容量时淘汰最早写入的条目
+        
+        Args:
+            cache: 缓存字典（依赖dict的插入顺序）
+            key: 缓存键
+            value: 缓存值
+            max_size: 最大条目数
+        """
+        cache.pop(key, None)
+        cache[key] = value
+        while len(cache) > max_size:
+            del cache[next(iter(cache))]
+
+    async def _generate_final_answer(self, query: str, context: str, answer: str = "", reasoning_trace: str = "", citations: List[str] = [], forced: bool = False,
+                                     speculative: Optional["asyncio.Task"] = None) -> Dict[str, Any]:
         """
         生成最终答案
         
@@ -200,16 +388,20 @@ class MainAgent:
             reasoning_trace: 推理过程（如有）
             citations: 引用列表
             forced: 是否强制生成
+            speculative: 已提前启动的最终答案生成任务（如有）
             
         Returns:
             最终结果
         """
         try:
             if not answer or forced:
-                # 使用planner生成最终答案
-                final_result = self.planner.generate_final_answer(
-                    query, context
-                )
+                # 使用planner生成最终答案（优先复用推测执行的结果）
+                if speculative is not None:
+                    final_result = await speculative
+                else:
+                    final_result = await self._call_tool(
+                        self.planner.generate_final_answer, query, context
+                    )
                 answer = final_result.get('answer', answer)
                 citations = final_result.get('citations', citations)
                 reasoning_trace = final_result.get('reasoning_trace', reasoning_trace)
@@ -266,5 +458,7 @@ class MainAgent:
         """重置会话"""
         print("🔄 重置Agent会话...")
         self._reset_reasoning_state()
+        self._subquery_cache.clear()
+        self._content_cache.clear()
         self.memory_manager._initialize_session()
         print("✅ 会话重置完成")
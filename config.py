@@ -2,9 +2,19 @@
 配置文件：包含模型路径、知识库路径、工具启用项等
 """
 import os
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Any, Mapping
 
-class Config:
+class _ConfigMeta(type):
+    """配置类的元类：修改公开配置项时使get_config的快照失效"""
+    
+    def __setattr__(cls, name, value):
+        super().__setattr__(name, value)
+        if not name.startswith('_') and '_snapshot' in cls.__dict__:
+            type.__delattr__(cls, '_snapshot')
+
+
+class Config(metaclass=_ConfigMeta):
     """系统配置类"""
     
     # 模型配置
@@ -35,32 +45,66 @@ class Config:
     MAX_CONTEXT_LENGTH = 8192
     TEMPERATURE = 0.7
     RECENT_CONTEXT = 1
+    # 最后一轮与反思并行推测生成最终答案：反思直接给出答案时，线程中已发出的调用无法取消，
+    # 每次查询会多付一次完整的最终答案调用，因此默认关闭
+    ENABLE_SPECULATIVE_FINAL_ANSWER = False
+    # 分解查询的同时预加载知识库检索工具：只含链接的查询（如FRAMES）用不到知识库，
+    # 预加载会白白加载索引，因此默认关闭，按需懒加载
+    PRELOAD_KNOWLEDGE_BASE = False
+    MEMORY_FLUSH_INTERVAL = 5
+    MAX_CONSECUTIVE_FAILURES = 3
+    SUBQUERY_CACHE_SIZE = 256
+    CONTENT_CACHE_SIZE = 64
+    
+    # Planner缓存配置（只对完全相同的查询复用分解结果；默认关闭，避免跨次运行复用旧结果）
+    ENABLE_PLANNER_CACHE = False
+    PLANNER_CACHE_FLUSH_INTERVAL = 5
     
     # 工具启用配置
     ENABLE_WEB_SEARCH = True
     ENABLE_SUMMARIZER = True
+    SUMMARY_MAX_CONCURRENCY = 8
+    
+    # 本进程中已确认存在的目录，重复调用ensure_dir时不再访问文件系统
+    _ensured_dirs = set()
     
     @classmethod
-    def get_config(cls) -> Dict[str, Any]:
-        """获取所有配置"""
-        return {
-            attr: getattr(cls, attr) 
-            for attr in dir(cls) 
-            if not attr.startswith('_') and not callable(getattr(cls, attr))
-        }
+    def get_config(cls) -> Mapping[str, Any]:
+        """获取所有配置（首次调用时生成快照，之后直接返回只读视图；修改配置项后自动重建）"""
+        if '_snapshot' not in cls.__dict__:
+            cls._snapshot = MappingProxyType({
+                attr: value
+                for attr, value in vars(cls).items()
+                if not attr.startswith('_') and not callable(value)
+                and not isinstance(value, (classmethod, staticmethod))
+            })
+        return cls._snapshot
+    
+    @classmethod
+    def ensure_dir(cls, path: str) -> str:
+        """
+        确保目录存在（在首次写入文件前调用；同一目录在进程内只创建一次）
+        
+        Args:
+            path: 目录路径
+            
+        Returns:
+            目录路径
+        """
+        if path not in cls._ensured_dirs:
+            os.makedirs(path, exist_ok=True)
+            cls._ensured_dirs.add(path)
+        return path
     
     @classmethod
     def setup_directories(cls):
-        """创建必要的目录"""
+        """一次性创建所有数据目录（供初始化脚本显式调用）"""
+        # 子目录创建时会一并创建DATA_DIR
         directories = [
-            cls.DATA_DIR,
             cls.KNOWLEDGE_BASE_DIR,
             cls.INDEX_DIR,
             cls.MEMORY_CACHE_DIR
         ]
         
         for directory in directories:
-            os.makedirs(directory, exist_ok=True)
-
-# 初始化目录
-Config.setup_directories()
+            cls.ensure_dir(directory)
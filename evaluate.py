@@ -3,95 +3,297 @@ FRAMES基准评测脚本
 使用多智能体系统回答问题，然后用DeepSeek-R1评估答案正确性
 """
 import argparse
+import asyncio
+import hashlib
+import itertools
 import json
 import os
-import time
-import io
+import re
 import sys
-from typing import List, Dict, Any
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext, redirect_stdout
+from typing import List, Dict, Any, Optional, Iterable, Tuple
 from datetime import datetime
-
-# 添加项目根目录到路径
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from importlib.util import find_spec
 
 from config import Config
-from openai import OpenAI
-from datasets import load_dataset
 from tqdm import tqdm
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# httpx启用HTTP/2需要h2；只检查是否已安装，不执行其导入
+HTTP2_AVAILABLE = find_spec('h2') is not None
+
 # 配置DeepSeek客户端用于评估
 DEEPSEEK_CLIENT = None
 
+# 是否输出每个问题的处理细节及agent内部过程（并发时逐条打印会与进度条交错，默认关闭）
+VERBOSE = False
+
+# 标准答案原样出现在回答中时直接判为正确，跳过DeepSeek评估（默认关闭，便于与完整评估对比）
+LOCAL_MATCH = False
+# 参与本地匹配的标准答案最短长度，过短的答案（如单个数字）容易误命中
+LOCAL_MATCH_MIN_LENGTH = 4
+
+# 空闲的多智能体系统实例，跨问题复用；每个实例同一时刻只处理一个问题
+_IDLE_SYSTEMS = []
+
+# 评测用到的数据集列
+DATASET_COLUMNS = ('Prompt', 'Answer', 'reasoning_types', 'wiki_links')
+
+# 评估结果字段：兼容<decision>/<explanation>标签和"Decision:"/"解释："前缀行（含全角冒号）
+_EVAL_FIELD_RE = re.compile(
+    r"<(decision|explanation)>(.*?)</\1>"
+    r"|^[ \t]*(决定|Decision|解释|Explanation)[ \t]*[:：][ \t]*([^\n]*)$",
+    re.DOTALL | re.IGNORECASE | re.MULTILINE
+)
+_EVAL_FIELD_NAMES = {'决定': 'decision', '解释': 'explanation'}
+# 决定字段中第一个出现的判定词
+_VERDICT_RE = re.compile(r"\b(TRUE|FALSE)\b", re.IGNORECASE)
+# 批量评估输出中的单个JSON对象（逐个解析，数组被截断时仍能保留已完整输出的条目）
+_BATCH_ENTRY_RE = re.compile(r"\{[^{}]*\}")
+
+# 完整结果写入文件后，内存中只保留跳过已处理问题和最终统计所需的字段
+_SUMMARY_FIELDS = ('index', 'evaluation_decision', 'reasoning_type', 'response_time')
+
+# 单条评估与批量评估共用的指导原则
+_EVALUATION_GUIDELINES = """===指导原则===
+1. 仔细比较"AI系统回答"与"标准答案"。
+2. 关注答案的实质内容 - 寻找等价信息或正确答案。
+3. 不要过分关注确切的措辞，除非确切措辞对意义至关重要。
+4. 你的最终决定应基于"标准答案"的含义和重要事实是否在"AI系统回答"中体现。"""
+
+# 评估指令固定放在system消息中，每次请求的前缀相同，可命中DeepSeek的上下文缓存
+_EVAL_SYSTEM_PROMPT = f"""你是一个客观公正的AI评估助手。
+
+===任务===
+我需要你帮助评估一个AI系统提供的答案与标准答案的匹配程度。你的任务是判断标准答案的内容是否在AI系统的回答中体现。
+
+{_EVALUATION_GUIDELINES}
+
+===输出格式===
+严格按照以下输出格式输出，不要输出其它无关内容：
+<explanation>(你是如何做出决定的?)</explanation>
+<decision>("TRUE" 或 "FALSE")</decision>"""
+
+_BATCH_EVAL_SYSTEM_PROMPT = f"""你是一个客观公正的AI评估助手。
+
+===任务===
+我需要你帮助评估多个AI系统提供的答案与标准答案的匹配程度。对每一组数据，判断标准答案的内容是否在AI系统的回答中体现。
+
+{_EVALUATION_GUIDELINES}
+
+===输出格式===
+严格输出一个JSON数组，每组数据对应一个对象，不要输出其它无关内容：
+[{{"i": 组编号, "explanation": "你是如何做出决定的?", "decision": "TRUE 或 FALSE"}}]"""
+
+# 评估用户消息模板（写在评估函数中）变化时递增，使旧的缓存评估结果失效
+_JUDGE_PROMPT_VERSION = 1
+
+def judge_fingerprint(eval_batch_size: int = 1) -> str:
+    """
+    当前评估配置的指纹：评估模型、所用的评估提示词和批量方式，作为评估缓存键的一部分
+    
+    Args:
+        eval_batch_size: 合并为一次DeepSeek评估调用的最大回答数
+        
+    Returns:
+        指纹字符串
+    """
+    system_prompt = _BATCH_EVAL_SYSTEM_PROMPT if eval_batch_size > 1 else _EVAL_SYSTEM_PROMPT
+    content = '\x1f'.join((Config.DEEPSEEK_MODEL, str(_JUDGE_PROMPT_VERSION),
+                           str(max(1, eval_batch_size)), system_prompt))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def _eval_max_tokens(num_items: int = 1) -> int:
+    """
+    评估调用的输出token上限
+    
+    推理模型的思维链也计入max_tokens，需要保留余量；普通对话模型只输出解释和判定，
+    按每条回答512个token收紧上限
+    
+    Args:
+        num_items: 一次调用中评估的回答数
+        
+    Returns:
+        max_tokens
+    """
+    if 'reasoner' in Config.DEEPSEEK_MODEL:
+        return 4096 + 256 * (num_items - 1)
+    return 512 * num_items
+
 def init_deepseek_client():
     """初始化DeepSeek客户端"""
+    import httpx
+    from openai import AsyncOpenAI
+    
     global DEEPSEEK_CLIENT
     api_key = Config.DEEPSEEK_API_KEY
     if not api_key:
         raise ValueError("DEEPSEEK_API_KEY 未设置，请在环境变量中配置")
     
-    DEEPSEEK_CLIENT = OpenAI(
+    # 所有并发评估共用一个异步客户端：保持长连接，可用时通过HTTP/2多路复用
+    DEEPSEEK_CLIENT = AsyncOpenAI(
         api_key=api_key,
-        base_url=Config.DEEPSEEK_BASE_URL
+        base_url=Config.DEEPSEEK_BASE_URL,
+        http_client=httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            timeout=httpx.Timeout(600.0, connect=10.0)
+        )
     )
 
+def _log(message: str):
+    """输出单个问题的处理细节，仅在VERBOSE时打印（经tqdm.write输出，不打断进度条）"""
+    if VERBOSE:
+        tqdm.write(message)
+
+def _status(message: str):
+    """输出评测过程中始终需要显示的状态和错误信息（写到stderr，安静模式下不被屏蔽）"""
+    tqdm.write(message, file=sys.stderr)
+
+@contextmanager
+def _quiet_stdout():
+    """非VERBOSE时在评测期间屏蔽标准输出，agent和工具内部逐步打印的信息不再与进度条争用输出"""
+    if VERBOSE:
+        yield
+        return
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        yield
+
+def _normalize_answer(text: str) -> str:
+    """大小写折叠并合并空白，用于本地字符串匹配"""
+    return ' '.join(text.casefold().split())
+
+def local_match(system_response: str, ground_truth: str) -> bool:
+    """
+    判断标准答案是否原样出现在系统回答中
+    
+    Args:
+        system_response: 系统回答
+        ground_truth: 标准答案
+        
+    Returns:
+        是否匹配
+    """
+    if not ground_truth or not system_response:
+        return False
+    truth = _normalize_answer(ground_truth)
+    return len(truth) >= LOCAL_MATCH_MIN_LENGTH and truth in _normalize_answer(system_response)
+
+def _dumps_line(data: Any) -> bytes:
+    """序列化为一行UTF-8编码的JSON（优先使用orjson）"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(data, ensure_ascii=False) + '\n').encode('utf-8')
+
+def _loads(raw: bytes) -> Any:
+    """解析JSON（优先使用orjson）"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode('utf-8'))
+
 def load_existing_results(filename: str) -> List[Dict]:
-    """加载已有的评测结果"""
+    """加载已有的评测结果（JSON Lines，每行一个结果）"""
+    results = []
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(filename, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    results.append(_loads(line))
+                except ValueError:
+                    # 中断时可能留下写了一半的最后一行
+                    print(f"⚠️ 跳过无法解析的结果行: {line[:50]!r}")
     except FileNotFoundError:
-        return []
-
-def save_result(filename: str, result: Dict):
-    """保存单个评测结果"""
-    results = load_existing_results(filename)
-    results.append(result)
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
-
-def get_last_processed_index(results: List[Dict]) -> int:
-    """获取最后处理的索引"""
-    if not results:
-        return -1
-    return max(int(r.get('index', -1)) for r in results)
-
-def generate_research_prompt(prompt: str, wiki_links: List[str]) -> str:
-    """生成研究提示"""
-    if wiki_links:
-        return f"根据以下Wikipedia资源回答问题:\n{wiki_links}\n\n问题: {prompt}"
-    else:
-        return f"问题: {prompt}"
+        pass
+    return results
 
-def get_system_response(query: str, context: str = "") -> Dict[str, Any]:
+def _summary_record(result: Dict) -> Dict:
+    """只保留统计所需字段，丢弃回答、引用和推理轨迹等大字段"""
+    return {field: result[field] for field in _SUMMARY_FIELDS if field in result}
+
+def migrate_json_results(json_filename: str, jsonl_filename: str):
+    """将旧版JSON数组格式的结果文件转换为JSON Lines格式"""
+    if os.path.exists(jsonl_filename) or not os.path.exists(json_filename):
+        return
+    with open(json_filename, 'rb') as f:
+        results = _loads(f.read())
+    with open(jsonl_filename, 'wb') as f:
+        for result in results:
+            f.write(_dumps_line(result))
+    print(f"🔄 已将 {len(results)} 个旧结果转换为JSON Lines格式: {jsonl_filename}")
+
+def save_result(f, result: Dict):
+    """追加保存单个评测结果（f为以二进制追加模式打开的结果文件）"""
+    f.write(_dumps_line(result))
+    f.flush()
+
+def parse_indices(indices_str: str) -> List[int]:
     """
-    使用多智能体系统获取回答
+    解析问题索引表达式，例如 "0-9,15,20-24"
     
     Args:
-        query: 查询问题
-        context: 上下文信息
+        indices_str: 逗号分隔的索引或闭区间
         
     Returns:
-        系统回答结果
+        去重并升序排列的索引列表
     """
-    try:
-        # 导入系统
-        from main import MultiAgentResearchSystem
-        system = MultiAgentResearchSystem()
-        
-        # 调用系统
-        result =  system.research_query(query, context)
-        return result
-        
-    except Exception as e:
-        print(f"❌ 系统调用失败: {str(e)}")
-        return {
-            'answer': f"系统错误: {str(e)}",
-            'citations': [],
-            'reasoning_trace': "",
-            'error': str(e)
-        }
+    indices = set()
+    for part in indices_str.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, sep, end = part.partition('-')
+        if sep:
+            indices.update(range(int(start), int(end) + 1))
+        else:
+            indices.add(int(start))
+    return sorted(indices)
+
+def generate_research_prompt(prompt: str, wiki_links) -> str:
+    """生成研究提示（wiki_links可以是链接列表，也可以是数据集中已格式化的字符串）"""
+    if not wiki_links:
+        return f"问题: {prompt}"
+    if not isinstance(wiki_links, str):
+        wiki_links = "\n".join(wiki_links)
+    return f"根据以下Wikipedia资源回答问题:\n{wiki_links}\n\n问题: {prompt}"
+
+def _new_system():
+    """新建一个多智能体系统实例"""
+    from main import MultiAgentResearchSystem
+    return MultiAgentResearchSystem()
+
+async def _warm_up_systems(count: int):
+    """
+    在线程中并行预建系统实例放入空闲列表，避免在事件循环上同步初始化
+    
+    Args:
+        count: 需要的空闲实例总数
+    """
+    missing = count - len(_IDLE_SYSTEMS)
+    if missing <= 0:
+        return
+    _status(f"🔥 预热 {missing} 个系统实例...")
+    systems = await asyncio.gather(*(asyncio.to_thread(_new_system) for _ in range(missing)))
+    _IDLE_SYSTEMS.extend(systems)
+
+def _acquire_system():
+    """取出一个空闲的系统实例，没有时才新建（并发数决定实例总数）"""
+    if _IDLE_SYSTEMS:
+        return _IDLE_SYSTEMS.pop()
+    return _new_system()
 
-def evaluate_response_with_deepseek(question: str, system_response: str, ground_truth: str) -> Dict[str, str]:
+def _release_system(system):
+    """归还系统实例供后续问题复用"""
+    _IDLE_SYSTEMS.append(system)
+
+async def evaluate_response_with_deepseek(question: str, system_response: str, ground_truth: str) -> Dict[str, str]:
     """
     使用DeepSeek-R1评估回答的正确性
     
@@ -103,70 +305,264 @@ def evaluate_response_with_deepseek(question: str, system_response: str, ground_
     Returns:
         评估结果 (decision, explanation)
     """
-    evaluation_prompt = f"""===任务===
-我需要你帮助评估一个AI系统提供的答案与标准答案的匹配程度。你的任务是判断标准答案的内容是否在AI系统的回答中体现。
-
-===指导原则===
-1. 仔细比较"AI系统回答"与"标准答案"。
-2. 关注答案的实质内容 - 寻找等价信息或正确答案。
-3. 不要过分关注确切的措辞，除非确切措辞对意义至关重要。
-4. 你的最终决定应基于"标准答案"的含义和重要事实是否在"AI系统回答"中体现。
-
-===输入数据===
+    evaluation_prompt = f"""===输入数据===
 - 问题: {question}
 - AI系统回答: {system_response}
 - 标准答案: {ground_truth}
 
-===输出格式===
-严格按照以下输出格式输出，不要输出其它无关内容：
-<explanation>(你是如何做出决定的?)</explanation>
-<decision>("TRUE" 或 "FALSE")</decision>
-
 请开始评估。"""
 
     try:
-        evaluation_response = DEEPSEEK_CLIENT.chat.completions.create(
+        evaluation_response = await DEEPSEEK_CLIENT.chat.completions.create(
             model=Config.DEEPSEEK_MODEL,
             messages=[
-                {"role": "system", "content": "你是一个客观公正的AI评估助手。"},
+                {"role": "system", "content": _EVAL_SYSTEM_PROMPT},
                 {"role": "user", "content": evaluation_prompt}
             ],
-            max_tokens=4096,
+            max_tokens=_eval_max_tokens(),
             temperature=0.3,
         )
         
         evaluation_text = evaluation_response.choices[0].message.content.strip()
-        print(f"📋 DeepSeek评估结果:\n{evaluation_text}")
+        _log(f"📋 DeepSeek评估结果:\n{evaluation_text}")
         
-        # 提取决定和解释
-        lines = evaluation_text.split('\n')
-        decision = "FALSE"
-        explanation = ""
+        # 提取决定和解释（每个字段取首次出现）
+        fields = {}
+        for match in _EVAL_FIELD_RE.finditer(evaluation_text):
+            name = match.group(1) or match.group(3)
+            value = match.group(2) if match.group(1) else match.group(4)
+            name = _EVAL_FIELD_NAMES.get(name, name.lower())
+            fields.setdefault(name, value.strip())
+            if len(fields) == 2:
+                break
         
-        for line in lines:
-            line = line.strip()
-            if "决定:" in line or "Decision:" in line:
-                decision_part = line.split(":", 1)[1].strip().upper()
-                if "TRUE" in decision_part:
-                    decision = "TRUE"
-                elif "FALSE" in decision_part:
-                    decision = "FALSE"
-            elif "解释:" in line or "Explanation:" in line:
-                explanation = line.split(":", 1)[1].strip()
+        verdict = _VERDICT_RE.search(fields.get("decision", ""))
+        decision = verdict.group(1).upper() if verdict else "FALSE"
+        explanation = fields.get("explanation", "")
         
         return {"decision": decision, "explanation": explanation}
         
     except Exception as e:
-        print(f"❌ DeepSeek评估失败: {str(e)}")
+        _status(f"❌ DeepSeek评估失败: {str(e)}")
         return {"decision": "FALSE", "explanation": f"评估错误: {str(e)}"}
 
-def process_single_item(item: Dict[str, Any], index: int) -> Dict[str, Any]:
+async def evaluate_batch_with_deepseek(items: List[tuple]) -> List[Tuple[Dict[str, str], bool]]:
+    """
+    在一次DeepSeek调用中评估多组回答
+    
+    Args:
+        items: (问题, 系统回答, 标准答案) 元组列表
+        
+    Returns:
+        与items一一对应的 (评估结果, 是否由批量评估得出) 列表；
+        只有一条或批量结果缺失而逐条补评的条目为单条评估
+    """
+    if len(items) == 1:
+        return [(await evaluate_response_with_deepseek(*items[0]), False)]
+    
+    inputs = "\n\n".join(
+        f"[{i}]\n- 问题: {question}\n- AI系统回答: {system_response}\n- 标准答案: {ground_truth}"
+        for i, (question, system_response, ground_truth) in enumerate(items)
+    )
+    evaluation_prompt = f"""===输入数据===
+{inputs}
+
+请开始评估。"""
+    
+    evaluations: Dict[int, Dict[str, str]] = {}
+    try:
+        evaluation_response = await DEEPSEEK_CLIENT.chat.completions.create(
+            model=Config.DEEPSEEK_MODEL,
+            messages=[
+                {"role": "system", "content": _BATCH_EVAL_SYSTEM_PROMPT},
+                {"role": "user", "content": evaluation_prompt}
+            ],
+            max_tokens=_eval_max_tokens(len(items)),
+            temperature=0.3,
+        )
+        
+        evaluation_text = evaluation_response.choices[0].message.content.strip()
+        _log(f"📋 DeepSeek批量评估结果:\n{evaluation_text}")
+        
+        # 逐个对象解析，跳过代码块标记；个别对象损坏或数组被截断时只补评缺失的条目
+        for match in _BATCH_ENTRY_RE.finditer(evaluation_text):
+            try:
+                entry = json.loads(match.group(0))
+                i = int(entry['i'])
+            except (ValueError, KeyError, TypeError):
+                continue
+            if 0 <= i < len(items) and i not in evaluations:
+                verdict = _VERDICT_RE.search(str(entry.get('decision', '')))
+                evaluations[i] = {
+                    "decision": verdict.group(1).upper() if verdict else "FALSE",
+                    "explanation": str(entry.get('explanation', ''))
+                }
+    except Exception as e:
+        _status(f"❌ DeepSeek批量评估失败: {str(e)}，逐条重新评估")
+    
+    # 批量结果缺失的条目并发逐条补评
+    missing = [i for i in range(len(items)) if i not in evaluations]
+    if missing:
+        retried = await asyncio.gather(*(evaluate_response_with_deepseek(*items[i]) for i in missing))
+        evaluations.update(zip(missing, retried))
+    return [(evaluations[i], i not in missing) for i in range(len(items))]
+
+class JudgeCache:
+    """按(问题, 系统回答, 标准答案)内容寻址的DeepSeek评估结果缓存，持久化为JSON Lines"""
+    
+    def __init__(self, filename: str, eval_batch_size: int = 1):
+        """
+        加载已有缓存，并以追加模式打开缓存文件
+        
+        Args:
+            filename: 缓存文件路径
+            eval_batch_size: 合并为一次DeepSeek评估调用的最大回答数，与模型和提示词一起
+                计入评估配置指纹（见judge_fingerprint），配置变化后旧结果不再命中
+        """
+        self.fingerprint = judge_fingerprint(eval_batch_size)
+        # 批量评估中逐条补评的结果由单条评估提示词得出，按单条评估的指纹缓存
+        self.single_fingerprint = judge_fingerprint(1)
+        self.entries: Dict[str, Dict[str, str]] = {}
+        for entry in load_existing_results(filename):
+            key = entry.pop('key', None)
+            if key:
+                self.entries[key] = entry
+        self._file = open(filename, 'ab')
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._file.close()
+    
+    def make_key(self, question: str, system_response: str, ground_truth: str, batched: bool = True) -> str:
+        """计算评估配置与评估输入的内容哈希（batched为False时使用单条评估的指纹）"""
+        fingerprint = self.fingerprint if batched else self.single_fingerprint
+        content = '\x1f'.join((fingerprint, question or '', system_response or '', ground_truth or ''))
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        """查找缓存的评估结果"""
+        return self.entries.get(key)
+    
+    def put(self, key: str, evaluation: Dict[str, str]):
+        """写入评估结果（评估调用失败的结果不缓存）"""
+        if evaluation.get('explanation', '').startswith('评估错误'):
+            return
+        self.entries[key] = evaluation
+        self._file.write(_dumps_line({'key': key, **evaluation}))
+        self._file.flush()
+
+class ResearchDeduplicator:
+    """同一次评测中相同的研究提示只调用一次多智能体系统，重复的问题（包括并发中的）共享同一回答"""
+    
+    def __init__(self, prompt_counts: Dict[str, int]):
+        """
+        初始化去重器
+        
+        Args:
+            prompt_counts: 待处理问题中每个研究提示出现的次数
+        """
+        # 只跟踪出现多次的提示；每次取走结果后计数减一，归零时释放缓存的回答
+        self._remaining = {prompt: count for prompt, count in prompt_counts.items() if count > 1}
+        self._futures: Dict[str, asyncio.Future] = {}
+    
+    async def research(self, prompt: str, research_fn) -> Tuple[Dict[str, Any], float]:
+        """
+        获取研究提示对应的系统回答
+        
+        Args:
+            prompt: 研究提示
+            research_fn: 实际调用多智能体系统的无参协程函数
+            
+        Returns:
+            (系统回答结果, 响应时间)
+        """
+        if prompt not in self._remaining:
+            return await research_fn()
+        
+        future = self._futures.get(prompt)
+        if future is None:
+            future = asyncio.ensure_future(research_fn())
+            self._futures[prompt] = future
+        try:
+            # 某个等待者被取消时不影响共享同一回答的其它问题
+            return await asyncio.shield(future)
+        finally:
+            self._remaining[prompt] -= 1
+            if self._remaining[prompt] == 0:
+                del self._remaining[prompt]
+                self._futures.pop(prompt, None)
+
+class EvaluationBatcher:
+    """收集并发产生的评估请求，凑满一批或等待超时后合并为一次DeepSeek调用"""
+    
+    def __init__(self, batch_size: int, max_wait: float = 5.0):
+        """
+        初始化批量评估器
+        
+        Args:
+            batch_size: 每批最多合并的评估数
+            max_wait: 未凑满一批时的最长等待秒数
+        """
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._pending = []
+        self._timer = None
+        # 持有运行中批次任务的引用，防止被垃圾回收
+        self._tasks = set()
+    
+    async def evaluate(self, question: str, system_response: str, ground_truth: str) -> Tuple[Dict[str, str], bool]:
+        """提交一条评估请求并等待其结果，返回 (评估结果, 是否由批量评估得出)"""
+        if self.batch_size <= 1:
+            return await evaluate_response_with_deepseek(question, system_response, ground_truth), False
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(((question, system_response, ground_truth), future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+    
+    def _flush(self):
+        """将当前收集到的请求作为一批发出"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run_batch(self, batch: List[tuple]):
+        """执行一批评估并分发结果"""
+        items = [item for item, _ in batch]
+        try:
+            evaluations = await evaluate_batch_with_deepseek(items)
+        except Exception as e:
+            evaluations = [({"decision": "FALSE", "explanation": f"评估错误: {str(e)}"}, True)] * len(items)
+        for (_, future), evaluation in zip(batch, evaluations):
+            if not future.done():
+                future.set_result(evaluation)
+
+async def process_single_item(item: Dict[str, Any], index: int,
+                              batcher: Optional[EvaluationBatcher] = None,
+                              agent_slots: Optional[asyncio.Semaphore] = None,
+                              judge_cache: Optional[JudgeCache] = None,
+                              deduplicator: Optional[ResearchDeduplicator] = None) -> Dict[str, Any]:
     """
     处理单个评测项目
     
     Args:
         item: 数据集项目
         index: 项目索引
+        batcher: 批量评估器（为空时单独调用DeepSeek评估）
+        agent_slots: 限制同时运行的多智能体调用数（只在获取回答期间占用，评估时释放）
+        judge_cache: 评估结果缓存（相同输入不再重复调用DeepSeek）
+        deduplicator: 研究提示去重器（重复问题只调用一次多智能体系统）
         
     Returns:
         处理结果
@@ -175,9 +571,7 @@ def process_single_item(item: Dict[str, Any], index: int) -> Dict[str, Any]:
     question = item.get('Prompt')
     ground_truth = item.get('Answer')
     reasoning_type = item.get('reasoning_types')
-    wiki_links = item.get('wiki_links')
-    prompt = generate_research_prompt(question, wiki_links)
-
+    
     if not question:
         return {
             'index': index,
@@ -185,20 +579,32 @@ def process_single_item(item: Dict[str, Any], index: int) -> Dict[str, Any]:
             'evaluation_decision': 'FALSE'
         }
     
-    print(f"📝 处理问题 {index}: {question[:100]}...")
+    prompt = generate_research_prompt(question, item.get('wiki_links'))
+    
+    _log(f"📝 处理问题 {index}: {question[:100]}...")
     
-    # 记录开始时间
-    start_time = time.time()
+    async def research() -> Tuple[Dict[str, Any], float]:
+        async with agent_slots or nullcontext():
+            system = _acquire_system()
+            # 拿到并发槽位和系统后才开始计时，排队等待的时间不计入响应时间
+            start_time = time.perf_counter()
+            try:
+                return await system.research_query(prompt), time.perf_counter() - start_time
+            finally:
+                _release_system(system)
     
-    # 使用多智能体系统获取回答
+    # 使用多智能体系统获取回答（重复问题复用首次调用的实际响应时间）
     try:
-        system_result =  get_system_response(prompt)
+        if deduplicator is not None:
+            system_result, response_time = await deduplicator.research(prompt, research)
+        else:
+            system_result, response_time = await research()
         system_answer = system_result.get('answer', '')
         system_citations = system_result.get('citations', [])
         reasoning_trace = system_result.get('reasoning_trace', "")
         
     except Exception as e:
-        print(f"❌ 系统调用失败: {str(e)}")
+        _status(f"❌ 系统调用失败: {str(e)}")
         return {
             'index': index,
             'question': question,
@@ -211,17 +617,30 @@ def process_single_item(item: Dict[str, Any], index: int) -> Dict[str, Any]:
             'error': str(e)
         }
     
-    # 记录响应时间
-    response_time = time.time() - start_time
-    
-    print(f"💡 系统回答: {system_answer[:100]}...")
-    print(f"⏱️ 响应时间: {response_time:.2f}秒")
+    _log(f"💡 系统回答: {system_answer[:100]}...")
+    _log(f"⏱️ 响应时间: {response_time:.2f}秒")
     
     # 使用DeepSeek评估答案
-    print("🔍 正在评估答案...")
-    evaluation = evaluate_response_with_deepseek(question, system_answer, ground_truth)
+    _log("🔍 正在评估答案...")
+    cache_key = judge_cache.make_key(question, system_answer, ground_truth) if judge_cache else None
+    cached = judge_cache.get(cache_key) if judge_cache else None
+    if LOCAL_MATCH and local_match(system_answer, ground_truth):
+        evaluation = {"decision": "TRUE", "explanation": "标准答案原样出现在系统回答中（本地匹配，未调用DeepSeek）"}
+    elif cached is not None:
+        _log("⚡ 命中评估缓存")
+        evaluation = cached
+    else:
+        if batcher is not None:
+            evaluation, batched = await batcher.evaluate(question, system_answer, ground_truth)
+        else:
+            evaluation, batched = await evaluate_response_with_deepseek(question, system_answer, ground_truth), False
+        if judge_cache:
+            # 逐条评估的结果（包括批量解析失败后的补评）按单条评估的指纹缓存
+            if not batched:
+                cache_key = judge_cache.make_key(question, system_answer, ground_truth, batched=False)
+            judge_cache.put(cache_key, evaluation)
     
-    print(f"✅ 评估结果: {evaluation['decision']}")
+    _log(f"✅ 评估结果: {evaluation['decision']}")
     
     return {
         'index': index,
@@ -236,7 +655,108 @@ def process_single_item(item: Dict[str, Any], index: int) -> Dict[str, Any]:
         'response_time': response_time,
     }
 
+async def evaluate_dataset(dataset, results: List[Dict], results_file, concurrency: int,
+                           eval_batch_size: int = 1,
+                           target_indices: Optional[Iterable[int]] = None,
+                           judge_cache: Optional[JudgeCache] = None) -> int:
+    """
+    并发处理数据集中尚未评测的问题，按完成顺序保存结果
+    
+    Args:
+        dataset: 数据集
+        results: 已有结果的统计字段列表（新结果写入文件后，其统计字段追加到其中）
+        results_file: 以追加模式打开的结果文件
+        concurrency: 同时运行多智能体系统的最大问题数
+        eval_batch_size: 合并为一次DeepSeek评估调用的最大回答数
+        target_indices: 只评测这些索引的问题（为空时评测整个数据集）
+        judge_cache: 评估结果缓存
+        
+    Returns:
+        本次处理的问题数
+    """
+    # 并发完成顺序不固定，按索引集合判断是否已处理
+    processed_indices = {int(r.get('index', -1)) for r in results}
+    semaphore = asyncio.Semaphore(concurrency)
+    batcher = EvaluationBatcher(eval_batch_size)
+    
+    async def run_item(index: int, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # 并发槽位只在多智能体调用期间占用：一个问题进入评估后，下一个问题即可开始检索推理
+        try:
+            return await process_single_item(item, index, batcher, semaphore, judge_cache, deduplicator)
+        except Exception as e:
+            _status(f"❌ 处理问题 {index} 失败: {str(e)}")
+            return None
+    
+    # 只物化尚未处理的行和用到的列，跳过的行不再逐行从Arrow转换为字典
+    candidates = range(len(dataset)) if target_indices is None else target_indices
+    pending_indices = [i for i in candidates if 0 <= i < len(dataset) and i not in processed_indices]
+    unused_columns = [c for c in dataset.column_names if c not in DATASET_COLUMNS]
+    pending_rows = dataset.select(pending_indices).remove_columns(unused_columns)
+    
+    # 只读取问题和链接两列统计重复的研究提示
+    questions = pending_rows['Prompt'] if pending_indices else []
+    links = pending_rows['wiki_links'] if 'wiki_links' in pending_rows.column_names else itertools.repeat(None)
+    deduplicator = ResearchDeduplicator(Counter(
+        generate_research_prompt(question, wiki_links)
+        for question, wiki_links in zip(questions, links) if question
+    ))
+    
+    # 每个并发槽位一个独立实例，提前建好后各问题之间不共享agent状态
+    await _warm_up_systems(min(concurrency, len(pending_indices)))
+    
+    # 按需从数据集取行并创建任务，同时在途的问题数有上限：
+    # 除占用并发槽位的问题外，再留出等待评估和凑批的余量
+    rows = zip(pending_indices, pending_rows)
+    max_in_flight = 2 * concurrency + eval_batch_size
+    in_flight = set()
+    
+    def refill():
+        for index, item in itertools.islice(rows, max_in_flight - len(in_flight)):
+            in_flight.add(asyncio.create_task(run_item(index, item)))
+    
+    processed_count = 0
+    # 只对待处理的问题计数，重绘至多每秒一次
+    progress = tqdm(total=len(pending_indices), desc="处理问题", mininterval=1.0, smoothing=0.1)
+    try:
+        refill()
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            in_flight.difference_update(done)
+            refill()
+            for task in done:
+                progress.update(1)
+                result = task.result()
+                if result is None:
+                    continue
+                save_result(results_file, result)
+                results.append(_summary_record(result))
+                processed_count += 1
+    finally:
+        progress.close()
+        # 异步客户端的连接池绑定在当前事件循环上，循环结束前关闭
+        if DEEPSEEK_CLIENT is not None:
+            await DEEPSEEK_CLIENT.close()
+    
+    return processed_count
+
 def main():
+    parser = argparse.ArgumentParser(description="FRAMES基准评测")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="同时运行多智能体系统的最大问题数（评估阶段不占用）")
+    parser.add_argument("--eval-batch-size", type=int, default=1,
+                        help="合并为一次DeepSeek评估调用的最大回答数（默认1即逐条评估；大于1时改变评分方式，与逐条评估的结果不可直接比较）")
+    parser.add_argument("--indices", type=parse_indices, default=None,
+                        help="只评测指定索引的问题，例如 0-9,15,20-24")
+    parser.add_argument("--local-match", action="store_true",
+                        help="标准答案原样出现在回答中时直接判为正确，不调用DeepSeek评估")
+    parser.add_argument("--verbose", action="store_true",
+                        help="输出每个问题的回答、评估细节和agent的中间过程")
+    args = parser.parse_args()
+    
+    global VERBOSE, LOCAL_MATCH
+    VERBOSE = args.verbose
+    LOCAL_MATCH = args.local_match
+    
     print("🚀 开始FRAMES基准评测")
     print("="*60)
     
@@ -250,6 +770,7 @@ def main():
     
     # 加载数据集
     print(f"📁 加载数据集")
+    from datasets import load_dataset
     dataset = load_dataset("google/frames-benchmark", split="test")
     
     if not dataset:
@@ -259,46 +780,51 @@ def main():
     print(f"📊 数据集包含 {len(dataset)} 个问题")
     
     # 准备结果文件
-    filename = f"frames_evaluation_multi_agent.json"
+    filename = f"frames_evaluation_multi_agent.jsonl"
     results_dir = os.path.join(Config.DATA_DIR, 'evaluation_results')
-    os.makedirs(results_dir, exist_ok=True)
+    Config.ensure_dir(results_dir)
     full_filename = os.path.join(results_dir, filename)
+    migrate_json_results(full_filename[:-1], full_filename)
     
-    # 检查已有结果
-    existing_results = load_existing_results(full_filename)
-    last_processed_index = get_last_processed_index(existing_results)
+    # 检查已有结果（只在启动时读取一次文件，之后以内存中的列表为准）
+    results = [_summary_record(r) for r in load_existing_results(full_filename)]
     
     print(f"📋 结果将保存到: {full_filename}")
-    if existing_results:
-        print(f"🔄 发现已有结果 {len(existing_results)} 个，从索引 {last_processed_index + 1} 开始")
+    if results:
+        print(f"🔄 发现已有结果 {len(results)} 个，将跳过已处理的问题")
     
     # 处理数据集
-    processed_count = 0
-    
-    for i, item in enumerate(tqdm(dataset, desc="处理问题")):
-        index = i
-        
-        # 跳过已处理的项目
-        if index <= last_processed_index:
-            continue
-        
-        try:
-            result =  process_single_item(item, index)
-            save_result(full_filename, result)
-            processed_count += 1
-            
-        except Exception as e:
-            print(f"❌ 处理问题 {index} 失败: {str(e)}")
-            continue
+    judge_cache_filename = os.path.join(results_dir, 'judge_cache.jsonl')
+    with open(full_filename, 'ab') as results_file, JudgeCache(judge_cache_filename, args.eval_batch_size) as judge_cache, \
+            _quiet_stdout():
+        processed_count = asyncio.run(
+            evaluate_dataset(dataset, results, results_file, max(1, args.concurrency),
+                             args.eval_batch_size, args.indices, judge_cache)
+        )
+    print(f"✅ 本次处理了 {processed_count} 个问题")
     
     # 计算并输出最终统计
     print("\n" + "="*60)
     print("📊 最终评测统计")
     print("="*60)
     
-    results = load_existing_results(full_filename)
+    # 单次遍历同时累计总体与各推理类型的统计量
     total_samples = len(results)
-    correct_answers = sum(1 for r in results if r.get('evaluation_decision') == 'TRUE')
+    correct_answers = 0
+    response_time_sum = 0.0
+    response_time_count = 0
+    type_buckets = defaultdict(lambda: [0, 0])  # 推理类型 -> [正确数, 样本数]
+    for r in results:
+        is_correct = r.get('evaluation_decision') == 'TRUE'
+        correct_answers += is_correct
+        response_time = r.get('response_time')
+        if response_time:
+            response_time_sum += response_time
+            response_time_count += 1
+        for rt in r.get('reasoning_type', 'unknown').split('|'):
+            bucket = type_buckets[rt.strip()]
+            bucket[0] += is_correct
+            bucket[1] += 1
     accuracy = correct_answers / total_samples if total_samples > 0 else 0
     
     print(f"总样本数: {total_samples}")
@@ -306,19 +832,14 @@ def main():
     print(f"准确率: {accuracy:.2%}")
     
     # 按单个推理类型统计准确率
-    reasoning_types = set(rt.strip() for r in results for rt in r.get('reasoning_type', 'unknown').split('|'))
     print(f"\n📈 按推理类型统计:")
-    for rt in reasoning_types:
-        rt_samples = [r for r in results if rt in r.get('reasoning_type', '')]
-        if rt_samples:
-            rt_correct = sum(1 for r in rt_samples if r.get('evaluation_decision') == 'TRUE')
-            rt_accuracy = rt_correct / len(rt_samples)
-            print(f"  {rt}: {rt_accuracy:.2%} ({rt_correct}/{len(rt_samples)})")
+    for rt, (rt_correct, rt_total) in type_buckets.items():
+        rt_accuracy = rt_correct / rt_total
+        print(f"  {rt}: {rt_accuracy:.2%} ({rt_correct}/{rt_total})")
     
     # 计算平均响应时间
-    response_times = [r.get('response_time', 0) for r in results if r.get('response_time')]
-    if response_times:
-        avg_time = sum(response_times) / len(response_times)
+    if response_time_count:
+        avg_time = response_time_sum / response_time_count
         print(f"\n⏱️ 平均响应时间: {avg_time:.2f}秒")
     
     print(f"\n💾 完整结果已保存到: {full_filename}")
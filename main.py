@@ -2,11 +2,44 @@
 系统入口：负责接收输入并执行主推理流程
 """
 import argparse
+import asyncio
+import threading
 from typing import Optional, Dict, Any
 from config import Config
 from agent.main_agent import MainAgent
 
 
+async def _async_input(prompt: str) -> str:
+    """
+    在守护线程中读取一行输入，等待期间不阻塞事件循环
+    
+    不使用默认线程池：退出时asyncio.run会等待线程池中仍阻塞在input()上的线程
+    
+    Args:
+        prompt: 输入提示
+        
+    Returns:
+        用户输入（EOF时抛出EOFError）
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def deliver(setter, value):
+        if not future.done():
+            setter(value)
+
+    def read():
+        try:
+            line = input(prompt)
+        except BaseException as e:
+            loop.call_soon_threadsafe(deliver, future.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(deliver, future.set_result, line)
+
+    threading.Thread(target=read, daemon=True).start()
+    return await future
+
+
 class MultiAgentResearchSystem:
     """多智能体深度研究系统主类"""
     
@@ -15,7 +48,7 @@ class MultiAgentResearchSystem:
         self.config = Config()
         self.main_agent = MainAgent()
         
-    def research_query(self, query: str, context: Optional[str] = None) -> Dict[str, Any]:
+    async def research_query(self, query: str, context: Optional[str] = None) -> Dict[str, Any]:
         """
         处理研究查询
         
@@ -28,7 +61,7 @@ class MultiAgentResearchSystem:
         """
         try:
             # 使用主Agent执行ReAct推理
-            result = self.main_agent.execute_reasoning(query, context)
+            result = await self.main_agent.execute_reasoning(query, context)
             
             print("✅ 查询处理完成")
             return result
@@ -42,7 +75,7 @@ class MultiAgentResearchSystem:
                 "error": True
             }
     
-    def interactive_mode(self):
+    async def interactive_mode(self):
         """交互模式"""
         print("🤖 多智能体深度研究系统启动")
         print("输入 'quit' 或 'exit' 退出系统")
@@ -51,7 +84,7 @@ class MultiAgentResearchSystem:
         
         while True:
             try:
-                query = input("\n请输入您的研究问题: ").strip()
+                query = (await _async_input("\n请输入您的研究问题: ")).strip()
                 
                 if query.lower() in ['quit', 'exit', '退出']:
                     print("👋 感谢使用，再见！")
@@ -66,7 +99,7 @@ class MultiAgentResearchSystem:
                     continue
                 
                 # 处理查询
-                result = self.research_query(query)
+                result = await self.research_query(query)
                 
                 # 显示结果
                 print("\n" + "="*60)
@@ -82,7 +115,7 @@ class MultiAgentResearchSystem:
                     for i, citation in enumerate(result['citations'], 1):
                         print(f"  [{i}] {citation}")
                 
-            except KeyboardInterrupt:
+            except (KeyboardInterrupt, EOFError):
                 print("\n\n👋 用户中断，退出系统")
                 break
             except Exception as e:
@@ -104,15 +137,18 @@ def main():
     if args.mode == "interactive":
         if args.query:
             # 单次查询模式
-            result = system.research_query(args.query)
+            result = asyncio.run(system.research_query(args.query))
             print(f"答案: {result['answer']}")
             if result.get('citations'):
                 print("引用:")
                 for citation in result['citations']:
                     print(f"  - {citation}")
         else:
-            # 交互模式
-            system.interactive_mode()
+            # 交互模式（等待输入时的Ctrl+C由事件循环抛出，在此处理）
+            try:
+                asyncio.run(system.interactive_mode())
+            except KeyboardInterrupt:
+                print("\n\n👋 用户中断，退出系统")
 
 
 if __name__ == "__main__":
@@ -3,10 +3,12 @@
 """
 import json
 import os
+from collections import defaultdict
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from config import Config
+from memory.persistence import SAVE_LOCK, atomic_write, dumps, loads, register_flush
 
 
 @dataclass
@@ -28,16 +30,27 @@ class MemoryManager:
         self.memory_file = os.path.join(Config.MEMORY_CACHE_DIR, 'memory.json')
         self.session_file = os.path.join(Config.MEMORY_CACHE_DIR, 'current_session.json')
         self.memory_entries = []
+        # 本实例已加载、写入或合并过的条目ID；不在其中的磁盘条目来自其它实例
+        self._known_ids = set()
+        # 倒排索引：词 -> [(条目下标, 权重)]，查询词命中权重0.4，答案词命中权重0.3
+        self._word_index: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        # 与memory_entries一一对应的(解析后的时间, 成功性权重)，搜索时免去重复解析
+        self._entry_meta: List[Tuple[Optional[datetime], float]] = []
+        # 已建立索引的条目数；索引在首次搜索时才按需补齐
+        self._indexed_count = 0
         self.current_session = {}
+        # 尚未写入磁盘的条目数，累计到MEMORY_FLUSH_INTERVAL时统一写入
+        self._pending_writes = 0
         self._load_memory()
         self._initialize_session()
+        register_flush(self)
     
     def _load_memory(self):
         """加载历史内存"""
         try:
             if os.path.exists(self.memory_file):
-                with open(self.memory_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                with open(self.memory_file, 'rb') as f:
+                    data = loads(f.read())
                     self.memory_entries = [MemoryEntry(**entry) for entry in data]
                 print(f"📚 加载了 {len(self.memory_entries)} 条历史记录")
             else:
@@ -46,9 +59,47 @@ class MemoryManager:
         except Exception as e:
             print(f"❌ 加载内存失败: {str(e)}")
             self.memory_entries = []
+        self._known_ids = {entry.id for entry in self.memory_entries}
+        self._invalidate_word_index()
+    
+    def _tokenize_entry(self, entry: MemoryEntry) -> tuple:
+        """计算条目的查询词集合和答案词集合"""
+        return set(entry.query.lower().split()), set(entry.final_answer.lower().split())
+    
+    def _index_entry(self, index: int, entry: MemoryEntry):
+        """将条目的查询词和答案词加入倒排索引"""
+        query_words, answer_words = self._tokenize_entry(entry)
+        for word in query_words:
+            self._word_index[word].append((index, 0.4))
+        for word in answer_words:
+            self._word_index[word].append((index, 0.3))
+        self._entry_meta.append(self._entry_static_weights(entry))
+    
+    def _entry_static_weights(self, entry: MemoryEntry) -> Tuple[Optional[datetime], float]:
+        """计算条目中与查询无关的部分：解析后的时间和成功性权重"""
+        try:
+            entry_time = datetime.fromisoformat(entry.timestamp)
+        except (TypeError, ValueError):
+            entry_time = None
+        # 有最终答案的记录权重更高
+        success_weight = 1.2 if entry.final_answer and len(entry.final_answer) > 20 else 1.0
+        return entry_time, success_weight
+    
+    def _invalidate_word_index(self):
+        """丢弃倒排索引，待下次搜索时重建"""
+        self._word_index = defaultdict(list)
+        self._entry_meta = []
+        self._indexed_count = 0
+    
+    def _ensure_index(self):
+        """为尚未建立索引的条目补齐倒排索引"""
+        for index in range(self._indexed_count, len(self.memory_entries)):
+            self._index_entry(index, self.memory_entries[index])
+        self._indexed_count = len(self.memory_entries)
     
     def _initialize_session(self):
         """初始化当前会话"""
+        self.flush()
         session_id = self._generate_session_id()
         self.current_session = {
             'session_id': session_id,
@@ -76,8 +127,10 @@ class MemoryManager:
             内存条目ID
         """
         try:
-            entry_id = self._generate_entry_id()
-            timestamp = datetime.now().isoformat()
+            # ID与时间戳共用一次取时
+            now = datetime.now()
+            entry_id = self._generate_entry_id(now)
+            timestamp = now.isoformat()
             
             entry = MemoryEntry(
                 id=entry_id,
@@ -88,6 +141,7 @@ class MemoryManager:
             )
             
             self.memory_entries.append(entry)
+            self._known_ids.add(entry_id)
             
             # 更新当前会话
             self.current_session['queries'].append({
@@ -97,9 +151,10 @@ class MemoryManager:
             })
             self.current_session['total_queries'] += 1
             
-            # 保存内存
-            self._save_memory()
-            self._save_session()
+            # 批量保存内存
+            self._pending_writes += 1
+            if self._pending_writes >= Config.MEMORY_FLUSH_INTERVAL:
+                self.flush()
             
             print(f"💾 保存内存条目: {entry_id}")
             return entry_id
@@ -108,9 +163,9 @@ class MemoryManager:
             print(f"❌ 保存内存条目失败: {str(e)}")
             return ""
     
-    def _generate_entry_id(self) -> str:
+    def _generate_entry_id(self, now: Optional[datetime] = None) -> str:
         """生成条目ID"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        timestamp = (now or datetime.now()).strftime("%Y%m%d_%H%M%S_%f")
         return f"entry_{timestamp}"
     
     def get_memory_entry(self, entry_id: str) -> Optional[MemoryEntry]:
@@ -141,10 +196,22 @@ class MemoryManager:
         """
         try:
             query_words = set(query.lower().split())
-            scored_entries = []
+            if not query_words:
+                return []
             
-            for entry in self.memory_entries:
-                score = self._calculate_memory_relevance(entry, query_words)
+            # 通过倒排索引累加词命中分数，只需遍历与查询有交集的条目
+            self._ensure_index()
+            overlap = defaultdict(float)
+            for word in query_words:
+                for index, weight in self._word_index.get(word, ()):
+                    overlap[index] += weight
+            
+            scored_entries = []
+            now = datetime.now()
+            for index in sorted(overlap):
+                entry = self.memory_entries[index]
+                score = self._weight_relevance(entry, overlap[index] / len(query_words), now,
+                                               self._entry_meta[index])
                 if score > 0:
                     scored_entries.append((entry, score))
             
@@ -157,43 +224,33 @@ class MemoryManager:
             print(f"❌ 搜索内存失败: {str(e)}")
             return []
     
-    def _calculate_memory_relevance(self, entry: MemoryEntry, query_words: set) -> float:
+    def _weight_relevance(self, entry: MemoryEntry, score: float,
+                          now: Optional[datetime] = None,
+                          meta: Optional[Tuple[Optional[datetime], float]] = None) -> float:
         """
-        计算内存条目与查询的相关性
+        对词匹配分数施加时间衰减和成功性权重
         
         Args:
             entry: 内存条目
-            query_words: 查询词集合
+            score: 词匹配分数
+            now: 当前时间（批量计算时由调用方统一传入）
+            meta: 预先计算的(解析后的时间, 成功性权重)
             
         Returns:
             相关性分数
         """
-        score = 0.0
-        
-        # 查询匹配
-        entry_query_words = set(entry.query.lower().split())
-        query_match = len(query_words & entry_query_words) / len(query_words) if query_words else 0
-        score += query_match * 0.4
-        
-        # 答案匹配
-        answer_words = set(entry.final_answer.lower().split())
-        answer_match = len(query_words & answer_words) / len(query_words) if query_words else 0
-        score += answer_match * 0.3
+        entry_time, success_weight = meta or self._entry_static_weights(entry)
         
         # 时间衰减（最近的记录权重更高）
-        try:
-            entry_time = datetime.fromisoformat(entry.timestamp)
-            time_diff = (datetime.now() - entry_time).days
-            time_weight = max(0.1, 1.0 - time_diff / 30)  # 30天后权重降至0.1
-            score *= time_weight
-        except:
-            pass
-        
-        # 成功性权重（有最终答案的记录权重更高）
-        if entry.final_answer and len(entry.final_answer) > 20:
-            score *= 1.2
+        if entry_time is not None:
+            try:
+                time_diff = ((now or datetime.now()) - entry_time).days
+                time_weight = max(0.1, 1.0 - time_diff / 30)  # 30天后权重降至0.1
+                score *= time_weight
+            except TypeError:
+                pass
         
-        return score
+        return score * success_weight
     
     def get_recent_context(self, limit: int = 5) -> str:
         """
@@ -269,6 +326,7 @@ class MemoryManager:
                 if datetime.fromisoformat(entry.timestamp) > cutoff_date
             ]
             
+            self._invalidate_word_index()
             cleaned_count = original_count - len(self.memory_entries)
             
             if cleaned_count > 0:
@@ -348,27 +406,55 @@ class MemoryManager:
             print(f"❌ 获取内存统计失败: {str(e)}")
             return {}
     
+    def flush(self):
+        """将缓冲的内存条目和会话信息写入磁盘"""
+        if self._pending_writes:
+            self._save_memory()
+            self._save_session()
+            self._pending_writes = 0
+    
     def _save_memory(self):
-        """保存内存到文件"""
+        """保存内存到文件（先合并其它实例已写入的条目，避免相互覆盖）"""
         try:
-            os.makedirs(Config.MEMORY_CACHE_DIR, exist_ok=True)
+            Config.ensure_dir(Config.MEMORY_CACHE_DIR)
+            
+            with SAVE_LOCK:
+                self._merge_saved_entries()
+                data = [asdict(entry) for entry in self.memory_entries]
+                atomic_write(self.memory_file, dumps(data))
             
-            data = [asdict(entry) for entry in self.memory_entries]
-            with open(self.memory_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-                
         except Exception as e:
             print(f"❌ 保存内存失败: {str(e)}")
     
+    def _merge_saved_entries(self):
+        """将文件中由其它实例写入、本实例尚未见过的条目按时间顺序并入内存"""
+        try:
+            with open(self.memory_file, 'rb') as f:
+                saved = loads(f.read())
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"⚠️ 读取已保存的内存失败，跳过合并: {str(e)}")
+            return
+        
+        new_entries = [
+            MemoryEntry(**entry) for entry in saved
+            if entry.get('id') not in self._known_ids
+        ]
+        if not new_entries:
+            return
+        self._known_ids.update(entry.id for entry in new_entries)
+        self.memory_entries = sorted(self.memory_entries + new_entries, key=lambda entry: entry.timestamp)
+        self._invalidate_word_index()
+    
     def _save_session(self):
         """保存当前会话"""
         try:
-            with open(self.session_file, 'w', encoding='utf-8') as f:
-                json.dump(self.current_session, f, ensure_ascii=False, indent=2)
+            Config.ensure_dir(Config.MEMORY_CACHE_DIR)
+            atomic_write(self.session_file, dumps(self.current_session))
         except Exception as e:
             print(f"❌ 保存会话失败: {str(e)}")
     
-    
     def get_similar_queries(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
         获取相似的历史查询
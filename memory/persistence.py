@@ -0,0 +1,68 @@
+"""
+缓存文件的持久化工具：JSON序列化、原子写入与进程退出时的统一落盘
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import weakref
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 同一进程中的多个实例共用同一缓存文件，读-合并-写需要串行
+SAVE_LOCK = threading.Lock()
+# 存活的缓冲写入对象（弱引用，不延长其生命周期），进程退出时统一调用flush
+_LIVE_BUFFERS = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_buffers():
+    for buffer in list(_LIVE_BUFFERS):
+        buffer.flush()
+
+
+def register_flush(buffer: Any):
+    """
+    登记带flush()方法的对象，进程退出时写入其缓冲的数据
+
+    Args:
+        buffer: 需要在退出时落盘的对象
+    """
+    _LIVE_BUFFERS.add(buffer)
+
+
+def atomic_write(path: str, data: bytes):
+    """
+    先写临时文件再替换目标文件，避免并发写入或中断时留下不完整的文件
+
+    Args:
+        path: 目标文件路径
+        data: 文件内容
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def dumps(data: Any) -> bytes:
+    """序列化为UTF-8编码的JSON（优先使用orjson）"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def loads(raw: bytes) -> Any:
+    """解析JSON（优先使用orjson）"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode('utf-8'))
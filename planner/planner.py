@@ -3,25 +3,44 @@ DeepSeek-R1调用器 + ReAct Prompt封装
 """
 import json
 import re
+from functools import lru_cache
 from typing import List, Dict, Any, Optional, Tuple
 from openai import OpenAI
 from config import Config
 from .prompt_templates import (
+    QUERY_DECOMPOSITION_SYSTEM_PROMPT,
     QUERY_DECOMPOSITION_PROMPT,
+    REFLECTION_SYSTEM_PROMPT,
     REFLECTION_PROMPT,
+    FINAL_ANSWER_SYSTEM_PROMPT,
     FINAL_ANSWER_PROMPT,
 )
 
+# 一次扫描提取响应中的所有<tag>...</tag>片段
+_TAG_RE = re.compile(r"<(\w+)>(.*?)</\1>", re.DOTALL | re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def _tag_pattern(tag: str) -> "re.Pattern":
+    """按标签名编译并缓存提取正则"""
+    return re.compile(f"<{re.escape(tag)}>(.*?)</{re.escape(tag)}>", re.DOTALL | re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def get_deepseek_client() -> OpenAI:
+    """进程内共享的DeepSeek客户端（线程安全），各planner和摘要工具复用同一连接池"""
+    return OpenAI(
+        api_key=Config.DEEPSEEK_API_KEY,
+        base_url=Config.DEEPSEEK_BASE_URL
+    )
+
 
 class DeepSeekPlanner:
     """DeepSeek模型调用器，实现ReAct推理规划"""
     
     def __init__(self):
         """初始化DeepSeek客户端"""
-        self.client = OpenAI(
-            api_key=Config.DEEPSEEK_API_KEY,
-            base_url=Config.DEEPSEEK_BASE_URL
-        )
+        self.client = get_deepseek_client()
         self.model = Config.DEEPSEEK_MODEL
         self.temperature = Config.TEMPERATURE
     
@@ -49,6 +68,25 @@ class DeepSeekPlanner:
         except Exception as e:
             raise Exception(f"DeepSeek API调用失败: {str(e)}")
     
+    def _build_messages(self, system_prompt: str, user_prompt: str) -> List[Dict[str, str]]:
+        """
+        构建对话消息：静态指令在前，动态内容在后
+        
+        DeepSeek会自动缓存与历史请求逐字节一致的前缀，
+        因此静态部分必须固定放在system消息中。
+        
+        Args:
+            system_prompt: 静态指令（包含格式要求和示例）
+            user_prompt: 动态内容（查询、上下文）
+            
+        Returns:
+            对话消息列表
+        """
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
     def decompose_query(self, query: str) -> List[str]:
         """
         分解复杂查询为子问题或提取web链接
@@ -60,10 +98,10 @@ class DeepSeekPlanner:
             子查询或web链接列表
         """
 
-        messages = [
-            {"role": "system", "content": "你是一个专业的查询分析师。"},
-            {"role": "user", "content": QUERY_DECOMPOSITION_PROMPT.format(query=query)}
-        ]
+        messages = self._build_messages(
+            QUERY_DECOMPOSITION_SYSTEM_PROMPT,
+            QUERY_DECOMPOSITION_PROMPT.format(query=query)
+        )
         
         response = self.generate_response(messages)
         print(f"🔍 分解查询: \n{response}")
@@ -88,32 +126,25 @@ class DeepSeekPlanner:
         Returns:
             反思结果
         """
-        messages = [
-            {"role": "system", "content": "你是一个专业的研究助手，负责评估研究进展。"},
-            {"role": "user", "content": REFLECTION_PROMPT.format(
-                query=query,
-                current_info=current_info
-            )}
-        ]
+        messages = self._build_messages(
+            REFLECTION_SYSTEM_PROMPT,
+            REFLECTION_PROMPT.format(query=query, current_info=current_info)
+        )
 
         response = self.generate_response(messages)
         print(f"📝 反思进展: \n{response}")
         
-        # 使用标签提取结果
-        judgment = self._extract_single_tag_content(response, "judgment")
-        answer = self._extract_single_tag_content(response, "answer")
-        reasoning = self._extract_single_tag_content(response, "reasoning")
-        citations_str = self._extract_single_tag_content(response, "citations")
-        suggestions_str = self._extract_single_tag_content(response, "suggestions")
+        # 一次扫描提取所有标签，判断与下一步查询建议来自同一次调用
+        tags = self._extract_tags(response)
+        judgment = tags.get("judgment", "")
+        answer = tags.get("answer", "")
+        reasoning = tags.get("reasoning", "")
+        citations_str = tags.get("citations", "")
+        suggestions_str = tags.get("suggestions", "")
         
         # 处理引用和建议
-        citations = []
-        if citations_str and citations_str != "无":
-            citations = [c.strip() for c in citations_str.split(';') if c.strip()]
-        
-        suggested_queries = []
-        if suggestions_str and suggestions_str != "无":
-            suggested_queries = [q.strip() for q in suggestions_str.split(';') if q.strip()]
+        citations = self._split_tag_list(citations_str)
+        suggested_queries = self._split_tag_list(suggestions_str)
         
         can_answer = "是" in judgment
         
@@ -137,26 +168,22 @@ class DeepSeekPlanner:
             最终答案字典
         """
         
-        messages = [
-            {"role": "system", "content": "你是一个专业的研究助手，负责整合信息生成最终答案。"},
-            {"role": "user", "content": FINAL_ANSWER_PROMPT.format(
-                query=query,
-                context=context
-            )}
-        ]
+        messages = self._build_messages(
+            FINAL_ANSWER_SYSTEM_PROMPT,
+            FINAL_ANSWER_PROMPT.format(query=query, context=context)
+        )
         
         response = self.generate_response(messages)
         print(f"📋 生成最终答案: \n{response}")
         
-        # 使用标签提取结果
-        answer = self._extract_single_tag_content(response, "answer")
-        reasoning = self._extract_single_tag_content(response, "reasoning")
-        citations_str = self._extract_single_tag_content(response, "citations")
+        # 一次扫描提取所有标签
+        tags = self._extract_tags(response)
+        answer = tags.get("answer", "")
+        reasoning = tags.get("reasoning", "")
+        citations_str = tags.get("citations", "")
         
         # 处理引用
-        citations = []
-        if citations_str and citations_str != "无":
-            citations = [c.strip() for c in citations_str.split(';') if c.strip()]
+        citations = self._split_tag_list(citations_str)
 
         print(f"回答内容：answer='{answer}', reasoning='{reasoning}', citations={citations}")
 
@@ -177,9 +204,39 @@ class DeepSeekPlanner:
         Returns:
             标签内容列表
         """
-        pattern = f"<{tag}>(.*?)</{tag}>"
-        matches = re.findall(pattern, text, re.DOTALL | re.IGNORECASE)
-        return [match.strip() for match in matches if match.strip()]
+        stripped = (match.strip() for match in _tag_pattern(tag).findall(text))
+        return [match for match in stripped if match]
+    
+    def _extract_tags(self, text: str) -> Dict[str, str]:
+        """
+        一次扫描提取文本中所有标签的内容
+        
+        Args:
+            text: 包含标签的文本
+            
+        Returns:
+            {小写标签名: 首个非空内容} 字典
+        """
+        tags = {}
+        for tag, content in _TAG_RE.findall(text):
+            content = content.strip()
+            if content:
+                tags.setdefault(tag.lower(), content)
+        return tags
+    
+    def _split_tag_list(self, content: str) -> List[str]:
+        """
+        将分号分隔的标签内容拆分为去重后的列表（保持原有顺序）
+        
+        Args:
+            content: 标签内容
+            
+        Returns:
+            去重后的条目列表
+        """
+        if not content or content == "无":
+            return []
+        return list(dict.fromkeys(item.strip() for item in content.split(';') if item.strip()))
     
     def _extract_single_tag_content(self, text: str, tag: str) -> str:
         """
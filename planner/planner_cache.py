@@ -0,0 +1,111 @@
+"""
+Planner缓存：对完全相同的查询直接复用已有的分解结果
+"""
+import copy
+import hashlib
+import os
+from typing import Any, Dict, List
+
+from config import Config
+from memory.persistence import SAVE_LOCK, atomic_write, dumps, loads, register_flush
+from .prompt_templates import QUERY_DECOMPOSITION_SYSTEM_PROMPT, QUERY_DECOMPOSITION_PROMPT
+
+
+def decomposition_fingerprint() -> str:
+    """
+    当前查询分解配置的指纹：模型、温度和分解提示词，任一变化都使旧的缓存结果失效
+
+    Returns:
+        指纹字符串
+    """
+    content = '\x1f'.join((Config.DEEPSEEK_MODEL, str(Config.TEMPERATURE),
+                           QUERY_DECOMPOSITION_SYSTEM_PROMPT, QUERY_DECOMPOSITION_PROMPT))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class PlannerCache:
+    """DeepSeekPlanner的精确匹配缓存包装器（只缓存查询分解）"""
+
+    def __init__(self, planner):
+        """
+        初始化缓存
+
+        Args:
+            planner: 被包装的DeepSeekPlanner实例
+        """
+        self.planner = planner
+        self.cache_file = os.path.join(Config.MEMORY_CACHE_DIR, 'planner_cache.json')
+        self.fingerprint = decomposition_fingerprint()
+        # {输入哈希: 分解结果}
+        self.entries: Dict[str, List[str]] = {}
+        # 尚未写入磁盘的新条目数，累计到PLANNER_CACHE_FLUSH_INTERVAL时统一写入
+        self._pending_writes = 0
+        self._load_cache()
+        register_flush(self)
+
+    def __getattr__(self, name: str) -> Any:
+        """未缓存的属性和方法直接转发给planner"""
+        return getattr(self.planner, name)
+
+    def decompose_query(self, query: str) -> List[str]:
+        """
+        分解查询，相同查询直接返回缓存结果
+
+        反思和最终答案依赖检索到的上下文，每次都需要重新生成，不做缓存
+        """
+        key = self._make_key(query)
+        cached = self.entries.get(key)
+        if cached is not None:
+            print("⚡ 命中planner缓存: decompose_query")
+            return copy.deepcopy(cached)
+
+        result = self.planner.decompose_query(query)
+        if result:
+            self.entries[key] = copy.deepcopy(result)
+            self._pending_writes += 1
+            if self._pending_writes >= Config.PLANNER_CACHE_FLUSH_INTERVAL:
+                self.flush()
+        return result
+
+    def _make_key(self, query: str) -> str:
+        """计算分解配置指纹与查询的内容哈希"""
+        content = f"{self.fingerprint}\x1f{query}"
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _read_file(self) -> Dict[str, List[str]]:
+        """读取缓存文件中的条目，文件不存在或格式不符时返回空字典"""
+        if not os.path.exists(self.cache_file):
+            return {}
+        with open(self.cache_file, 'rb') as f:
+            data = loads(f.read())
+        if isinstance(data, dict) and isinstance(data.get('entries'), dict):
+            return data['entries']
+        return {}
+
+    def _load_cache(self):
+        """加载持久化的缓存"""
+        try:
+            self.entries = self._read_file()
+            if self.entries:
+                print(f"📚 加载了 {len(self.entries)} 条planner缓存")
+        except Exception as e:
+            print(f"❌ 加载planner缓存失败: {str(e)}")
+            self.entries = {}
+
+    def flush(self):
+        """将新条目与文件中其它实例写入的条目合并后，原子地写回缓存文件"""
+        if not self._pending_writes:
+            return
+        try:
+            Config.ensure_dir(Config.MEMORY_CACHE_DIR)
+            with SAVE_LOCK:
+                try:
+                    merged = self._read_file()
+                except Exception:
+                    merged = {}
+                merged.update(self.entries)
+                atomic_write(self.cache_file, dumps({'entries': merged}))
+            self.entries = merged
+            self._pending_writes = 0
+        except Exception as e:
+            print(f"❌ 保存planner缓存失败: {str(e)}")
@@ -1,7 +1,8 @@
-# 查询分解提示
-QUERY_DECOMPOSITION_PROMPT = """请分析以下查询，如果包含Web链接则直接提取，否则分解为子问题：
+# 静态部分放在system消息中，动态部分放在user消息末尾，
+# 保证每次请求的前缀逐字节一致，以命中DeepSeek的上下文硬盘缓存
 
-原始查询: {query}
+# 查询分解提示
+QUERY_DECOMPOSITION_SYSTEM_PROMPT = """你是一个专业的查询分析师。请分析用户给出的原始查询，如果包含Web链接则直接提取，否则分解为子问题：
 
 如果查询中包含Web链接：
 - 直接提取所有Web链接
@@ -36,11 +37,10 @@ QUERY_DECOMPOSITION_PROMPT = """请分析以下查询，如果包含Web链接则
 <subquery>quantum supremacy</subquery>
 """
 
-# 反思提示模板
-REFLECTION_PROMPT = """基于以下信息，判断是否能够回答用户问题：
+QUERY_DECOMPOSITION_PROMPT = """原始查询: {query}"""
 
-原始问题: {query}
-已获得的信息: {current_info}
+# 反思提示模板
+REFLECTION_SYSTEM_PROMPT = """你是一个专业的研究助手，负责评估研究进展。基于用户给出的原始问题和已获得的信息，判断是否能够回答用户问题。
 
 请回答：
 1. 结合你自身知识以及当前收集的信息是否足够回答原始问题？(是/否)
@@ -75,11 +75,11 @@ REFLECTION_PROMPT = """基于以下信息，判断是否能够回答用户问题
 <suggestions>autonomous vehicle technology; machine learning algorithms in cars; self-driving car sensors</suggestions>
 """
 
-# 最终答案整合提示
-FINAL_ANSWER_PROMPT = """基于以下信息，请生成你最有把握的最终答案，并给出推理过程以及相关的参考链接：
+REFLECTION_PROMPT = """原始问题: {query}
+已获得的信息: {current_info}"""
 
-原始问题: {query}
-已获得的信息: {context}
+# 最终答案整合提示
+FINAL_ANSWER_SYSTEM_PROMPT = """你是一个专业的研究助手，负责整合信息生成最终答案。基于用户给出的原始问题和已获得的信息，请生成你最有把握的最终答案，并给出推理过程以及相关的参考链接。
 
 严格按照以下输出格式输出，不要输出其它无关内容：
 <answer>简洁明确的答案</answer>
@@ -98,3 +98,6 @@ FINAL_ANSWER_PROMPT = """基于以下信息，请生成你最有把握的最终
 <reasoning>根据已获得的信息，巴黎是法国的首都。</reasoning>
 <citations>https://en.wikipedia.org/wiki/France</citations>
 """
+
+FINAL_ANSWER_PROMPT = """原始问题: {query}
+已获得的信息: {context}"""
@@ -1,10 +1,10 @@
 """
 使用 Jina reranker 对召回结果重新打分排序
 """
-import requests
 import json
 from typing import List, Dict, Any, Tuple
 from config import Config
+from tools.http_session import get_session
 
 
 class JinaReranker:
@@ -43,12 +43,11 @@ class JinaReranker:
             # 准备文档文本
             doc_texts = []
             for doc in documents:
-                text = doc.get('content', '')
-                if doc.get('title'):
-                    text = doc['title'] + '\n' + text
-                # 限制文本长度以适应API限制
-                text = text[:2000] if len(text) > 2000 else text
-                doc_texts.append(text)
+                content = doc.get('content') or ''
+                title = doc.get('title')
+                text = f"{title}\n{content}" if title else content
+                # 限制文本长度以适应API限制（切片对短文本无额外开销）
+                doc_texts.append(text[:2000])
             
             # 调用Jina reranker API
             reranked_scores =  self._call_reranker_api(query, doc_texts)
@@ -94,7 +93,7 @@ class JinaReranker:
                 'top_k': len(documents)  # 返回所有文档的排序
             }
             
-            response = requests.post(
+            response = get_session().post(
                 self.api_url,
                 headers=headers,
                 json=data,
@@ -357,9 +356,10 @@ class HybridReranker:
             return  self.simple_reranker.rerank(query, documents, top_k)
         
         try:
-            # 获取两种重排序结果
-            jina_results =  self.jina_reranker.rerank(query, documents.copy())
-            simple_results =  self.simple_reranker.rerank(query, documents.copy())
+            # 获取两种重排序结果（两个重排序器都不修改输入列表；但Jina未启用或调用失败时
+            # 返回的是调用方的原始文档字典，_blend_rankings会先拷贝再写分数，这里不能直接修改结果中的文档）
+            jina_results =  self.jina_reranker.rerank(query, documents)
+            simple_results =  self.simple_reranker.rerank(query, documents)
             
             # 混合分数
             blended_results = self._blend_rankings(jina_results, simple_results, blend_ratio)
@@ -81,15 +81,16 @@ class IndexBuilder:
         """
         documents = []
         file_patterns = file_patterns or ['*.txt', '*.json', '*.md']
+        # 扩展名后缀在扫描前一次性计算，str.endswith可直接接受元组
+        suffixes = tuple(pattern.replace('*', '') for pattern in file_patterns)
         
         print(f"🔍 扫描目录: {data_dir}")
         
         for root, dirs, files in os.walk(data_dir):
             for file in files:
-                file_path = os.path.join(root, file)
-                
                 # 检查文件扩展名
-                if any(file.endswith(pattern.replace('*', '')) for pattern in file_patterns):
+                if file.endswith(suffixes):
+                    file_path = os.path.join(root, file)
                     try:
                         doc =  self._load_single_document(file_path)
                         if doc:
@@ -118,12 +119,14 @@ class IndexBuilder:
             if not content.strip():
                 return None
             
+            file_name = os.path.basename(file_path)
+            
             # 根据文件类型处理
             if file_path.endswith('.json'):
                 data = json.loads(content)
                 if isinstance(data, dict):
                     return {
-                        'id': data.get('id', os.path.basename(file_path)),
+                        'id': data.get('id', file_name),
                         'content': data.get('content', ''),
                         'title': data.get('title', ''),
                         'source': file_path,
@@ -131,17 +134,17 @@ class IndexBuilder:
                     }
                 else:
                     return {
-                        'id': os.path.basename(file_path),
+                        'id': file_name,
                         'content': json.dumps(data, ensure_ascii=False),
-                        'title': os.path.basename(file_path),
+                        'title': file_name,
                         'source': file_path,
                         'metadata': {}
                     }
             else:
                 return {
-                    'id': os.path.basename(file_path),
+                    'id': file_name,
                     'content': content,
-                    'title': os.path.basename(file_path),
+                    'title': file_name,
                     'source': file_path,
                     'metadata': {'file_size': len(content)}
                 }
@@ -270,7 +273,7 @@ class IndexBuilder:
             print("💾 保存索引...")
             
             # 确保目录存在
-            os.makedirs(Config.INDEX_DIR, exist_ok=True)
+            Config.ensure_dir(Config.INDEX_DIR)
             
             # 保存文档元数据
             docs_path = os.path.join(Config.INDEX_DIR, 'documents.pkl')
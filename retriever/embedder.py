@@ -2,10 +2,11 @@
 使用 Jina embedding 进行文本嵌入
 """
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
-import requests
 import json
 from config import Config
+from tools.http_session import get_session
 
 
 class JinaEmbedder:
@@ -38,12 +39,17 @@ class JinaEmbedder:
             
             # 分批处理，避免单次请求过大
             batch_size = 100
+            batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
             all_embeddings = []
             
-            for i in range(0, len(texts), batch_size):
-                batch_texts = texts[i:i + batch_size]
-                batch_embeddings =  self._embed_batch(batch_texts)
-                all_embeddings.extend(batch_embeddings)
+            if len(batches) <= 1:
+                for batch_texts in batches:
+                    all_embeddings.extend(self._embed_batch(batch_texts))
+            else:
+                # 双缓冲：处理当前批次结果时下一批请求已在途，结果仍按批次顺序合并
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    for batch_embeddings in executor.map(self._embed_batch, batches):
+                        all_embeddings.extend(batch_embeddings)
             
             print(f"✅ 嵌入完成，生成 {len(all_embeddings)} 个向量")
             return all_embeddings
@@ -88,7 +94,7 @@ class JinaEmbedder:
         }
         
         try:
-            response = requests.post(
+            response = get_session().post(
                 self.api_url,
                 headers=headers,
                 json=data,
@@ -5,10 +5,6 @@ import os
 import pickle
 import json
 from typing import List, Dict, Any, Optional, Tuple
-import sys
-
-# 添加项目根目录到路径
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import Config
 
@@ -23,6 +19,9 @@ class VectorRetriever:
         self.index = None
         self.documents = []
         self.index_type = 'simple'
+        # 文档的小写(正文, 标题)，关键词搜索时按需构建，文档列表变化后重建
+        self._lowered_texts = []
+        self._lowered_key = None
         self._initialize_components()
         self._load_index()
     
@@ -342,6 +341,22 @@ class VectorRetriever:
             print(f"❌ 混合搜索失败: {str(e)}")
             return  self.search(query, top_k)
     
+    def _get_lowered_texts(self) -> List[tuple]:
+        """
+        获取所有文档小写后的(正文, 标题)，文档只在加载后变化，不必每次查询都重新转换
+        
+        Returns:
+            与self.documents一一对应的(正文, 标题)列表
+        """
+        key = (id(self.documents), len(self.documents))
+        if self._lowered_key != key:
+            self._lowered_texts = [
+                (doc.get('content', '').lower(), doc.get('title', '').lower())
+                for doc in self.documents
+            ]
+            self._lowered_key = key
+        return self._lowered_texts
+    
     def _keyword_search(self, query: str, top_k: int) -> List[Dict[str, Any]]:
         """
         关键词搜索
@@ -356,10 +371,7 @@ class VectorRetriever:
         query_words = query.lower().split()
         scored_docs = []
         
-        for i, doc in enumerate(self.documents):
-            content = doc.get('content', '').lower()
-            title = doc.get('title', '').lower()
-            
+        for i, (doc, (content, title)) in enumerate(zip(self.documents, self._get_lowered_texts())):
             # 计算关键词匹配分数
             content_score = sum(content.count(word) for word in query_words)
             title_score = sum(title.count(word) * 2 for word in query_words)  # 标题权重更高
@@ -0,0 +1,35 @@
+"""
+文本分块边界测试
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.summarizer_tool import split_into_chunks
+
+
+def test_tail_inside_overlap_is_not_a_separate_chunk():
+    # 第二块[49500, 99500)已覆盖到文本末尾，不应再切出完全落在其重叠区内的第三块
+    for length in (99001, 99250, 99500):
+        chunks = split_into_chunks('x' * length, 50000, 500)
+        assert len(chunks) == 2
+        assert len(chunks[-1]) == length - 49500
+
+
+def test_tail_beyond_overlap_gets_its_own_chunk():
+    chunks = split_into_chunks('x' * 99501, 50000, 500)
+    assert len(chunks) == 3
+    assert len(chunks[-1]) == 501
+
+
+def test_chunks_cover_whole_text():
+    text = ''.join(chr(ord('a') + i % 26) for i in range(123456))
+    chunks = split_into_chunks(text, 50000, 500)
+    assert chunks[0] == text[:50000]
+    assert text.endswith(chunks[-1])
+    assert ''.join(chunk[500:] if i else chunk for i, chunk in enumerate(chunks)) == text
+
+
+def test_short_text_is_a_single_chunk():
+    assert split_into_chunks('abc', 50000, 500) == ['abc']
@@ -1,13 +1,22 @@
 """
-工具模块初始化
+工具模块初始化（按需导入，避免加载未使用工具的依赖）
 """
+import importlib
 
-from .search_tool import KnowledgeBaseSearchTool
-from .web_search_tool import WebSearchTool
-from .summarizer_tool import SummarizerTool
+_TOOL_MODULES = {
+    'KnowledgeBaseSearchTool': '.search_tool',
+    'WebSearchTool': '.web_search_tool',
+    'SummarizerTool': '.summarizer_tool'
+}
 
 __all__ = [
     'KnowledgeBaseSearchTool',
     'WebSearchTool',
     'SummarizerTool'
 ]
+
+
+def __getattr__(name):
+    if name in _TOOL_MODULES:
+        return getattr(importlib.import_module(_TOOL_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,25 @@
+"""
+Jina API调用共用的HTTP会话：每个线程一个requests.Session
+"""
+import threading
+
+import requests
+
+# requests.Session不保证线程安全（连接池之外还会修改cookie等状态），
+# 工具在多个工作线程中并发调用，因此按线程各持一个会话；
+# 线程池中的线程会被复用，同一线程内的请求仍可复用已建立的TCP/TLS连接
+_local = threading.local()
+
+
+def get_session() -> requests.Session:
+    """
+    获取当前线程的HTTP会话，首次调用时创建
+
+    Returns:
+        requests.Session实例
+    """
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        _local.session = session
+    return session
@@ -1,14 +1,8 @@
 """
 内部知识库搜索工具：调用 FAISS + reranker
 """
-import io
 from typing import List, Dict, Any, Optional
 from config import Config
-import sys
-import os
-
-# 添加项目根目录到路径
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
 class KnowledgeBaseSearchTool:
@@ -1,11 +1,53 @@
 """
 文本摘要器：长文档截断+压缩
 """
+import asyncio
 import re
 from typing import Dict, Any, List, Optional
 from config import Config
 
 
+# 句子重要性关键词
+IMPORTANT_WORDS = (
+    '重要', '关键', '主要', '核心', '基本', '显著', '明显',
+    '研究', '发现', '结果', '结论', '方法', '分析',
+    '因此', '所以', '总之', '综上', '可见'
+)
+# 零宽前瞻的多关键词交替：一次扫描即可找出所有（包括相互重叠的）关键词
+_IMPORTANT_WORDS_RE = re.compile('(?=(' + '|'.join(map(re.escape, IMPORTANT_WORDS)) + '))')
+# 关键词字符集：与之不相交的句子（如纯英文句子）不可能包含任何关键词，可跳过正则匹配
+_IMPORTANT_CHARS = frozenset(''.join(IMPORTANT_WORDS))
+_DIGIT_RE = re.compile(r'\d+')
+_PROPER_NOUN_RE = re.compile(r'[A-Z][a-z]+|《[^》]+》')
+# 各摘要风格的提示语
+STYLE_PROMPTS = {
+    'general': '请对以下文本进行摘要，保留主要信息和关键点：',
+    'academic': '请对以下学术文本进行摘要，重点保留研究方法、发现和结论：',
+    'news': '请对以下新闻文本进行摘要，突出关键事实和重要细节：',
+    'bullet_points': '请用要点形式总结以下文本的主要内容：'
+}
+# 句末标点统一映射为换行，之后按换行切分；连续标点产生的空串会在过滤短句时去掉
+_SENTENCE_END_TABLE = str.maketrans({'。': '\n', '！': '\n', '？': '\n', '；': '\n'})
+
+
+def split_into_chunks(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+    """
+    将文本切分为相邻块互相重叠的定长块
+    
+    起点在最后chunk_overlap个字符之内的块会完全落在上一块的重叠区中，不再单独切出
+    
+    Args:
+        text: 待切分的文本
+        chunk_size: 每块的字符数
+        chunk_overlap: 相邻块重叠的字符数
+        
+    Returns:
+        文本块列表
+    """
+    step = max(chunk_size - chunk_overlap, 1)
+    return [text[i:i + chunk_size] for i in range(0, max(1, len(text) - chunk_overlap), step)]
+
+
 class SummarizerTool:
     """文本摘要工具"""
     
@@ -20,11 +62,8 @@ class SummarizerTool:
     def _initialize_llm(self):
         """初始化LLM客户端用于摘要"""
         try:
-            from openai import OpenAI
-            self.llm_client = OpenAI(
-                api_key=Config.DEEPSEEK_API_KEY,
-                base_url=Config.DEEPSEEK_BASE_URL
-            )
+            from planner.planner import get_deepseek_client
+            self.llm_client = get_deepseek_client()
         except ImportError as e:
             print(f"⚠️ 警告: 无法初始化LLM客户端 - {e}")
             print("将使用基础摘要功能")
@@ -116,14 +155,7 @@ class SummarizerTool:
         Returns:
             LLM生成的摘要
         """
-        style_prompts = {
-            'general': '请对以下文本进行摘要，保留主要信息和关键点：',
-            'academic': '请对以下学术文本进行摘要，重点保留研究方法、发现和结论：',
-            'news': '请对以下新闻文本进行摘要，突出关键事实和重要细节：',
-            'bullet_points': '请用要点形式总结以下文本的主要内容：'
-        }
-        
-        prompt = style_prompts.get(style, style_prompts['general'])
+        prompt = STYLE_PROMPTS.get(style, STYLE_PROMPTS['general'])
         prompt += f"\n\n查询内容：{query}\n\n原文：\n{text}\n\n要求：\n1. 重点总结与查询内容「{query}」最相关的信息\n2. 优先提取能回答查询的关键内容和细节\n3. 严格控制摘要长度不超过{max_length}字符\n4. 保持相关信息的完整性和准确性\n5. 语言简洁清晰，直接生成摘要内容，不要生成其他没有用的内容"
         
         messages = [
@@ -169,31 +201,26 @@ class SummarizerTool:
         if not sentences:
             return text[:max_length]
         
-        # 计算句子重要性分数
-        scored_sentences = []
-        for i, sentence in enumerate(sentences):
-            score = self._calculate_sentence_score(sentence, i, len(sentences))
-            scored_sentences.append((sentence, score, i))
-        
-        # 按分数排序
-        scored_sentences.sort(key=lambda x: x[1], reverse=True)
+        # 按重要性分数降序排列句子下标（同分保持原有顺序）
+        total = len(sentences)
+        ranked = sorted(
+            range(total),
+            key=lambda i: self._calculate_sentence_score(sentences[i], i, total),
+            reverse=True
+        )
         
-        # 选择最重要的句子，直到达到长度限制
-        selected_sentences = []
+        # 选择最重要的句子，直到达到长度限制；按下标标记，无需再次排序恢复原顺序
+        selected = [False] * total
         current_length = 0
         
-        for sentence, score, original_index in scored_sentences:
-            if current_length + len(sentence) <= max_length:
-                selected_sentences.append((sentence, original_index))
-                current_length += len(sentence)
-            else:
+        for i in ranked:
+            if current_length + len(sentences[i]) > max_length:
                 break
+            selected[i] = True
+            current_length += len(sentences[i])
         
-        # 按原始顺序排序
-        selected_sentences.sort(key=lambda x: x[1])
-        
-        # 组合摘要
-        summary = ''.join([sentence for sentence, _ in selected_sentences])
+        # 按原始顺序一次性组合摘要
+        summary = ''.join([sentence for sentence, keep in zip(sentences, selected) if keep])
         
         return summary.strip()
     
@@ -207,17 +234,12 @@ class SummarizerTool:
         Returns:
             句子列表
         """
-        # 简单的句子分割（基于标点符号）
-        sentences = re.split(r'[。！？；\n]+', text)
-        
-        # 清理和过滤
-        cleaned_sentences = []
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if len(sentence) > 10:  # 过滤过短的句子
-                cleaned_sentences.append(sentence + '。')
-        
-        return cleaned_sentences
+        # 简单的句子分割（基于标点符号），清理并过滤过短的句子
+        return [
+            sentence + '。'
+            for sentence in map(str.strip, text.translate(_SENTENCE_END_TABLE).split('\n'))
+            if len(sentence) > 10
+        ]
     
     def _calculate_sentence_score(self, sentence: str, position: int, 
                                 total_sentences: int) -> float:
@@ -249,23 +271,16 @@ class SummarizerTool:
         elif sentence_len > 100:
             score += 0.1
         
-        # 关键词特征
-        important_words = [
-            '重要', '关键', '主要', '核心', '基本', '显著', '明显',
-            '研究', '发现', '结果', '结论', '方法', '分析',
-            '因此', '所以', '总之', '综上', '可见'
-        ]
-        
-        for word in important_words:
-            if word in sentence:
-                score += 0.1
+        # 关键词特征（每个出现过的关键词计一次）
+        if not _IMPORTANT_CHARS.isdisjoint(sentence):
+            score += 0.1 * len(set(_IMPORTANT_WORDS_RE.findall(sentence)))
         
         # 数字和统计数据
-        if re.search(r'\d+', sentence):
+        if _DIGIT_RE.search(sentence):
             score += 0.05
         
         # 引用和专有名词
-        if re.search(r'[A-Z][a-z]+|《[^》]+》', sentence):
+        if _PROPER_NOUN_RE.search(sentence):
             score += 0.05
         
         return score
@@ -348,6 +363,72 @@ class SummarizerTool:
             print("🔄 回退到常规总结")
             return self.summarize(text, final_summary_length, style)
     
+    async def parallel_batch_summarize(self, query: str, text: str,
+                                       chunk_size: int = 50000,
+                                       chunk_overlap: int = 500,
+                                       chunk_summary_length: int = 500,
+                                       final_summary_length: int = 500,
+                                       style: str = "general") -> str:
+        """
+        并发分批总结长文档：所有块同时总结，再对合并结果做一次最终总结
+        
+        Args:
+            query: 查询内容
+            text: 待总结的文本
+            chunk_size: 每块的字符数
+            chunk_overlap: 相邻块重叠的字符数，避免在块边界处截断关键信息
+            chunk_summary_length: 每块总结的长度
+            final_summary_length: 最终总结的长度
+            style: 总结风格
+            
+        Returns:
+            最终总结
+        """
+        if not text or not text.strip():
+            return ''
+        
+        try:
+            chunks = split_into_chunks(text, chunk_size, chunk_overlap)
+            print(f"📦 文本分割为 {len(chunks)} 块，并发总结中")
+            
+            # 限制并发数，避免超过API速率限制
+            semaphore = asyncio.Semaphore(Config.SUMMARY_MAX_CONCURRENCY)
+            chunk_summaries = await asyncio.gather(*[
+                self._summarize_chunk(query, chunk, chunk_summary_length, style, semaphore)
+                for chunk in chunks
+            ])
+            
+            combined_summary = "\n\n".join(chunk_summaries)
+            print(f"🔗 合并所有块总结，总长度: {len(combined_summary)} 字符")
+            
+            if len(combined_summary) <= final_summary_length:
+                return combined_summary
+            return await self._summarize_chunk(query, combined_summary, final_summary_length, style, semaphore)
+            
+        except Exception as e:
+            print(f"❌ 并发分批总结出错: {str(e)}，回退到抽取式摘要")
+            return self._extractive_summarize(text, final_summary_length)
+    
+    async def _summarize_chunk(self, query: str, chunk: str, max_length: int,
+                               style: str, semaphore: asyncio.Semaphore) -> str:
+        """
+        总结单个文本块（LLM调用在线程中执行）
+        
+        Args:
+            query: 查询内容
+            chunk: 文本块
+            max_length: 总结长度
+            style: 总结风格
+            semaphore: 并发控制信号量
+            
+        Returns:
+            文本块总结
+        """
+        async with semaphore:
+            if self.llm_client:
+                return await asyncio.to_thread(self._llm_summarize, query, chunk, max_length, style)
+            return self._extractive_summarize(chunk, max_length)
+    
     def _split_text_into_chunks(self, text: str, chunk_size: int) -> List[str]:
         """
         将文本分割为指定大小的块，尽量在句子边界分割
@@ -2,15 +2,19 @@
 Web搜索工具：使用Jina API读取Web内容
 """
 import os
+import re
 import json
-import requests
-from typing import List, Dict, Any, Optional
+from typing import Collection, List, Dict, Any, Optional
 import sys
 
 # 添加项目根目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import Config
+from tools.http_session import get_session
+
+# 搜索结果中"[n] URL Source: https://..."所在行，捕获行内第一个https://起到行尾的内容
+_URL_SOURCE_RE = re.compile(r'^[ \t]*\[(?=[^\n]*URL Source:)[^\n]*?(https://[^\n]*)', re.MULTILINE)
 
 
 class WebSearchTool:
@@ -22,12 +26,13 @@ class WebSearchTool:
         self.enabled = Config.ENABLE_WEB_SEARCH and bool(self.jina_api_key)
         self.knowledge_base_dir = Config.KNOWLEDGE_BASE_DIR
 
-    def _search_via_jina(self, query: str, links: List[str], count: int = 5) -> List[str]:
+    def _search_via_jina(self, query: str, links: Collection[str] = (), count: int = 5) -> List[str]:
         """
         使用Jina API搜索Web内容
         
         Args:
             query: 搜索查询
+            links: 已使用的链接（建议传入集合），结果中会排除这些链接
             count: 返回结果的数量
             
         Returns:
@@ -42,26 +47,23 @@ class WebSearchTool:
                 # "X-Site": "https://en.wikipedia.org/wiki/"
             }
             
-            response = requests.get(search_url, headers=headers, timeout=30)
+            response = get_session().get(search_url, headers=headers, timeout=30)
             if response.status_code == 200:
                 text = response.text
                 
                 # 解析搜索结果，提取URL
                 urls = []
-                lines = text.split('\n')
+                seen = set()
                 
-                for line in lines:
-                    if line.strip().startswith('[') and 'URL Source:' in line:
-                        # 提取URL
-                        url_start = line.find('https://')
-                        if url_start != -1:
-                            url = line[url_start:].strip()
-                            # 确保URL不重复
-                            if url not in urls and url not in links:
-                                urls.append(url)
-                            
-                            if len(urls) >= count:
-                                break
+                for match in _URL_SOURCE_RE.finditer(text):
+                    url = match.group(1).strip()
+                    # 确保URL不重复
+                    if url not in seen and url not in links:
+                        seen.add(url)
+                        urls.append(url)
+                    
+                    if len(urls) >= count:
+                        break
                 
                 print(f"✅ 找到 {len(urls)} 个Web页面URL：{', '.join(urls)}")
                 return urls
@@ -98,7 +100,7 @@ class WebSearchTool:
                 # 'Authorization': f'Bearer {self.jina_api_key}'
             }
             
-            response = requests.get(jina_url, headers=headers, timeout=30)
+            response = get_session().get(jina_url, headers=headers, timeout=30)
             if response.status_code == 200:
                 content = response.text
                 print(f"✅ 通过Jina API获取内容，长度: {len(content)}")
@@ -128,7 +130,7 @@ class WebSearchTool:
         """
         try:
             # 确保知识库目录存在
-            os.makedirs(self.knowledge_base_dir, exist_ok=True)
+            Config.ensure_dir(self.knowledge_base_dir)
             
             filename = f"{title}.txt"
             filepath = os.path.join(self.knowledge_base_dir, filename)